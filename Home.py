@@ -3,8 +3,17 @@ import openai
 from dotenv import load_dotenv
 import os
 from datetime import datetime
-import requests
-from geopy.geocoders import Nominatim
+from VAMM_core import analysis
+from VAMM_core.conversation import ConversationMemory
+from VAMM_core.scoring import SCORE_CAPS, ESGScoreParser, format_score_block, parse_esg_score, strip_score_block
+from VAMM_core.streaming import StreamRenderer, stream_llm_response
+
+# Set page config
+st.set_page_config(
+    page_title="Renewable Energy Project Consultant",
+    page_icon="🌱",
+    layout="wide"
+)
 
 # Load environment variables
 load_dotenv()
@@ -24,16 +33,11 @@ if 'projects' not in st.session_state:
 # Add to your session state initialization
 if 'messages' not in st.session_state:
     st.session_state.messages = []
+if 'conversation' not in st.session_state:
+    st.session_state.conversation = ConversationMemory()
 if 'current_analysis' not in st.session_state:
     st.session_state.current_analysis = None
 
-# Set page config
-st.set_page_config(
-    page_title="Renewable Energy Project Consultant",
-    page_icon="🌱",
-    layout="wide"
-)
-
 # Title and description
 st.title("Renewable Energy Project Consultant 🌱")
 st.markdown("""
@@ -57,198 +61,123 @@ project_type = st.selectbox(
 project_size = st.number_input("Estimated project size (in MW):", min_value=0.0, value=1.0)
 project_budget = st.number_input("Estimated budget (in USD millions):", min_value=0.0, value=1.0)
 
-system_prompt = """You are an agent consultant, perfectly trained on consulting for contractors 
-to start renewable energy projects in the United States. The user is a contractor looking to 
-build a new project and they want to be sure that they are up to standards with the ESG 
-guidelines of local areas. You will advise them on optimal areas, based on their selected 
-geographic destination. You will provide community sentiment, biodiversity analysis, and sustainability.
-
-For each analysis, you will also provide an ESG score from 0-100 based on the following criteria:
-- Environmental (40 points): Impact on local ecosystem, carbon footprint, resource efficiency
-- Social (30 points): Community benefits, job creation, social impact
-- Governance (30 points): Regulatory compliance, transparency, risk management
-
-Format the score section of your response as: 
-[ESG_SCORE]
-Environmental: X/40
-Social: X/30
-Governance: X/30
-Total Score: X/100
-[/ESG_SCORE]"""
-
-def stream_llm_response(response):
-    placeholder = st.empty()
-    full_response = ""
-    for chunk in response:
-        if chunk.choices[0].delta.content is not None:
-            full_response += chunk.choices[0].delta.content
-            placeholder.markdown(full_response + "▌")
-    placeholder.markdown(full_response)
-    return full_response
+# Parallel mode generates the E/S/G/Risk sections as concurrent calls
+analysis_mode = st.radio(
+    "Analysis mode:",
+    ["Single report", "Parallel sections"],
+    horizontal=True,
+    help="Parallel sections stream each part of the report side by side and usually finish sooner."
+)
 
 # Function to get AI response
-def get_ai_response(user_input, is_followup=False):
-    try:
-        messages = [
-            {"role": "system", "content": system_prompt},
-        ]
-        
-        # If it's a follow-up question, include previous context
-        if is_followup and st.session_state.messages:
-            messages.extend(st.session_state.messages)
-        
-        messages.append({"role": "user", "content": user_input})
-        
-        response = openai.chat.completions.create(
-            model="gpt-4",
-            messages=messages,
-            temperature=0.7,
-            max_tokens=1500,
-            stream=True  # Enable streaming
-        )
-        
-        full_response = stream_llm_response(response)
-        
-        # Store the interaction in session state
-        if not is_followup:
-            st.session_state.messages = messages + [
-                {"role": "assistant", "content": full_response}
-            ]
-        else:
-            st.session_state.messages.append(
-                {"role": "assistant", "content": full_response}
-            )
-            
+def get_ai_response(user_input, is_followup=False, render=stream_llm_response):
+    if not is_followup:
+        # A new analysis starts a fresh conversation
+        st.session_state.conversation = ConversationMemory()
+        full_response, messages = analysis.get_ai_response(user_input, render)
+        if messages:
+            st.session_state.messages = messages
         return full_response
-    except Exception as e:
-        return f"An error occurred: {str(e)}"
-
-def extract_esg_score(response):
-    try:
-        score_section = response.split("[ESG_SCORE]")[1].split("[/ESG_SCORE]")[0].strip()
-        total_score = float(score_section.split("Total Score: ")[1].split("/100")[0])
-        return total_score, score_section
-    except:
-        return None, None
-
-def get_fema_risks(lat, lon):
-    """Get comprehensive FEMA risk data for the location"""
-    if lat is None or lon is None:
-        return None, None
-    
-    # Get disaster declarations
-    disasters_url = "https://www.fema.gov/api/open/v1/DisasterDeclarationsSummaries"
-    disaster_params = {
-        "$filter": f"latitude gt {lat-1} and latitude lt {lat+1} and longitude gt {lon-1} and longitude lt {lon+1}",
-        "$orderby": "declarationDate desc",
-        "$top": 5
-    }
-    
-    # Get National Risk Index data
-    nri_url = "https://hazards.fema.gov/nri/public/api/data/county"
-    nri_params = {
-        "latitude": lat,
-        "longitude": lon
-    }
     
-    try:
-        disasters_response = requests.get(disasters_url, params=disaster_params)
-        nri_response = requests.get(nri_url, params=nri_params)
-        
-        disasters = None
-        risk_data = None
-        
-        if disasters_response.status_code == 200:
-            disasters = disasters_response.json().get('DisasterDeclarationsSummaries', [])
-        
-        if nri_response.status_code == 200:
-            risk_data = nri_response.json()
-            
-        return disasters, risk_data
-    except Exception as e:
-        print(f"Error fetching FEMA data: {str(e)}")
-        return None, None
+    # Follow-ups send a token-budgeted copy of the conversation; the full one is kept for display
+    conversation = st.session_state.conversation
+    context = conversation.context(st.session_state.messages, user_input)
+    full_response, messages = analysis.get_ai_response(user_input, render, history=context)
+    if len(messages) > len(context):
+        st.session_state.messages = st.session_state.messages + messages[len(context):]
+        conversation.update(st.session_state.messages)
+    return full_response
 
-def format_risk_context(disasters, risk_data):
-    """Format FEMA risk data into a readable context string"""
-    context = "\nFEMA Risk Analysis:\n"
+def get_parallel_analysis(user_prompt, fema_context):
+    prompts = {
+        section.name: analysis.build_section_prompt(
+            section, project_type, location, project_size, project_budget, fema_context
+        )
+        for section in analysis.SECTIONS
+    }
     
-    if disasters:
-        context += "\nRecent Disaster Declarations:\n"
-        for disaster in disasters:
-            context += f"- {disaster.get('declarationTitle')} ({disaster.get('declarationDate')})\n"
+    # One renderer per section, in a two-column grid
+    renderers = {}
+    columns = st.columns(2)
+    for i, section in enumerate(analysis.SECTIONS):
+        with columns[i % 2]:
+            st.markdown(f"#### {section.title}")
+            renderers[section.name] = StreamRenderer()
     
-    if risk_data:
-        context += "\nNational Risk Index Data:\n"
-        try:
-            risk_factors = risk_data.get('riskFactors', {})
-            for risk_type, risk_info in risk_factors.items():
-                if isinstance(risk_info, dict):
-                    risk_score = risk_info.get('score', 'N/A')
-                    risk_rating = risk_info.get('rating', 'N/A')
-                    context += f"- {risk_type}: Score {risk_score} ({risk_rating})\n"
-            
-            # Add overall risk scores
-            overall = risk_data.get('overall', {})
-            context += "\nOverall Risk Metrics:\n"
-            context += f"- Risk Score: {overall.get('riskScore', 'N/A')}\n"
-            context += f"- Risk Rating: {overall.get('riskRating', 'N/A')}\n"
-            context += f"- Resilience Score: {overall.get('resilienceScore', 'N/A')}\n"
-            
-        except Exception as e:
-            context += f"Error parsing risk data: {str(e)}\n"
+    # Deltas arrive from all sections interleaved; only this thread touches the placeholders
+    texts = {}
+    for name, delta in analysis.stream_sections(prompts):
+        if delta is None:
+            texts[name] = renderers[name].finish()
+        else:
+            renderers[name].write(delta)
     
-    return context
+    full_response = analysis.merge_sections(texts)
+    # Follow-ups continue from the merged report as if it were a single answer
+    st.session_state.messages = analysis.build_messages(user_prompt) + [
+        {"role": "assistant", "content": full_response}
+    ]
+    st.session_state.conversation = ConversationMemory()
+    return full_response
+
+def show_live_score(parser):
+    with score_area.container():
+        st.markdown("### ESG Score")
+        for label, cap in SCORE_CAPS.items():
+            if label in parser.scores:
+                st.progress(parser.scores[label] / cap, text=f"{label}: {parser.scores[label]:g}/{cap}")
+        if parser.complete:
+            st.markdown(f"### {int(parser.total)}/100")
 
-def get_coordinates(location):
-    """Convert location string to coordinates using Nominatim"""
-    try:
-        geolocator = Nominatim(user_agent="renewable_energy_consultant")
-        location_data = geolocator.geocode(location)
-        if location_data:
-            return location_data.latitude, location_data.longitude
-        return None, None
-    except Exception as e:
-        print(f"Error getting coordinates: {str(e)}")
-        return None, None
+def replace_score_block(response, parser):
+    # Swap in the re-asked block, in the conversation too so follow-ups see the score
+    fixed = strip_score_block(response).rstrip() + "\n\n" + format_score_block(
+        *(parser.scores[label] for label in SCORE_CAPS)
+    )
+    if st.session_state.messages and st.session_state.messages[-1]["content"] == response:
+        st.session_state.messages[-1] = {"role": "assistant", "content": fixed}
+    return fixed
 
 # Generate analysis button
 if st.button("Generate Analysis"):
     if location and project_type and project_name:
-        # Get location coordinates and FEMA data
-        lat, lon = get_coordinates(location)
-        disasters, risk_data = get_fema_risks(lat, lon) if lat and lon else (None, None)
+        # Get location coordinates (and FIPS codes when the gazetteer knows the place) and FEMA data
+        _, fema_context = analysis.gather_risk_context(location)
         
-        # Format FEMA risk context
-        fema_context = format_risk_context(disasters, risk_data) if disasters or risk_data else ""
-        
-        user_prompt = f"""
-        Please provide a comprehensive analysis for a {project_type} project in {location}.
-        Project Size: {project_size} MW
-        Budget: ${project_budget} million
-        {fema_context}
-        
-        Please include:
-        1. ESG Guidelines compliance analysis
-        2. Community sentiment assessment
-        3. Biodiversity impact analysis
-        4. Sustainability recommendations
-        5. Risk assessment and mitigation strategies:
-           - Natural disaster risks
-           - Environmental hazards
-           - Community resilience factors
-           - Infrastructure vulnerabilities
-        
-        End with an ESG score breakdown using the specified format.
-        """
+        user_prompt = analysis.build_analysis_prompt(project_type, location, project_size, project_budget, fema_context)
         
         with st.spinner("Generating analysis..."):
-            response = get_ai_response(user_prompt)
+            # The score sits above the analysis; in single-report mode it fills in while the text streams
+            score_area = st.empty()
+            if analysis_mode == "Parallel sections":
+                response = get_parallel_analysis(user_prompt, fema_context)
+                score_parser = parse_esg_score(response)
+            else:
+                score_parser = ESGScoreParser()
+                response = get_ai_response(
+                    user_prompt,
+                    render=lambda stream: stream_llm_response(stream, score_parser=score_parser, on_score=show_live_score)
+                )
+                if not score_parser.complete and not response.startswith("An error occurred"):
+                    # Don't keep replaying an analysis without a valid score; the re-ask below fixes this one
+                    analysis.forget_cached_analysis(user_prompt)
+            
+            if not score_parser.complete and not response.startswith("An error occurred"):
+                # Ask for just the score block again instead of regenerating the whole analysis
+                with st.spinner("Re-checking the ESG score..."):
+                    score_parser = parse_esg_score(analysis.request_score_block(response))
+                if score_parser.complete:
+                    response = replace_score_block(response, score_parser)
             st.session_state.current_analysis = response
             
             # Extract and display ESG score
-            score, score_details = extract_esg_score(response)
-            if score is not None:
+            score, score_details = score_parser.total, score_parser.score_section
+            if score is None:
+                score_area.warning(
+                    "The project was not added to the dashboard because the analysis has no valid ESG score: "
+                    + "; ".join(score_parser.problems())
+                )
+            else:
                 # Store project data in session state
                 project_data = {
                     "project_name": project_name,
@@ -261,18 +190,19 @@ if st.button("Generate Analysis"):
                 }
                 st.session_state.projects.append(project_data)
                 
-                col1, col2 = st.columns([1, 2])
-                with col1:
-                    st.markdown("### ESG Score")
-                    # Create a progress bar for the total score
-                    st.progress(score/100)
-                    st.markdown(f"### {int(score)}/100")
-                with col2:
-                    st.markdown("### Score Breakdown")
-                    st.text(score_details)
+                with score_area.container():
+                    col1, col2 = st.columns([1, 2])
+                    with col1:
+                        st.markdown("### ESG Score")
+                        # Create a progress bar for the total score
+                        st.progress(score/100)
+                        st.markdown(f"### {int(score)}/100")
+                    with col2:
+                        st.markdown("### Score Breakdown")
+                        st.text(score_details)
             
             st.markdown("### Detailed Analysis")
-            cleaned_response = response.split("[ESG_SCORE]")[0]
+            cleaned_response = strip_score_block(response)
             st.markdown(cleaned_response)
             
             # Add a success message
@@ -294,11 +224,7 @@ if st.session_state.current_analysis:
         if follow_up:
             with st.spinner("Getting response..."):
                 # Create context-aware prompt
-                context_prompt = f"""
-                Regarding the previous analysis about the {project_type} project in {location},
-                please answer the following question:
-                {follow_up}
-                """
+                context_prompt = analysis.build_followup_prompt(project_type, location, follow_up)
                 
                 follow_up_response = get_ai_response(context_prompt, is_followup=True)
                 
@@ -0,0 +1,290 @@
+"""
+ESG project analysis: prompts, FEMA risk context and the chat completion call.
+
+Nothing here touches Streamlit at import time; callers pass a render function
+(e.g. VAMM_core.streaming.stream_llm_response) to display the streamed answer.
+
+The analysis can also be generated as concurrent per-section calls (SECTIONS):
+stream_sections() runs them on worker threads and yields their deltas, tagged with
+the section, to the calling thread; merge_sections() joins the texts and builds the
+usual [ESG_SCORE] block from the sections' sub-scores.
+"""
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import openai
+
+from VAMM_core.fema import fetch_fema_risks, format_risk_context, local_hazard_counts
+from VAMM_core.geocoder import GeocodeResult, geocode
+from VAMM_core.llm_cache import cached_chat_stream, forget
+from VAMM_core.scoring import extract_section_score, format_score_block, strip_score_block
+
+ANALYSIS_MODEL = "gpt-4"
+ANALYSIS_TEMPERATURE = 0.7
+ANALYSIS_MAX_TOKENS = 1500
+
+consultant_prompt = """You are an agent consultant, perfectly trained on consulting for contractors
+to start renewable energy projects in the United States. The user is a contractor looking to
+build a new project and they want to be sure that they are up to standards with the ESG
+guidelines of local areas. You will advise them on optimal areas, based on their selected
+geographic destination. You will provide community sentiment, biodiversity analysis, and sustainability."""
+
+system_prompt = consultant_prompt + """
+
+For each analysis, you will also provide an ESG score from 0-100 based on the following criteria:
+- Environmental (40 points): Impact on local ecosystem, carbon footprint, resource efficiency
+- Social (30 points): Community benefits, job creation, social impact
+- Governance (30 points): Regulatory compliance, transparency, risk management
+
+Format the score section of your response as:
+[ESG_SCORE]
+Environmental: X/40
+Social: X/30
+Governance: X/30
+Total Score: X/100
+[/ESG_SCORE]"""
+
+
+def gather_risk_context(location: str) -> Tuple[Optional[GeocodeResult], str]:
+    """Geocode the location and format its FEMA declarations, hazard history and NRI data"""
+    # FIPS codes come along when the gazetteer knows the place
+    geo = geocode(location)
+    lat, lon = (geo.latitude, geo.longitude) if geo else (None, None)
+    county_fips = geo.county_fips if geo else None
+    state_fips = geo.state_fips if geo else None
+    disasters, risk_data = fetch_fema_risks(lat, lon, county_fips, state_fips) if lat and lon else (None, None)
+
+    hazard_counts = local_hazard_counts(county_fips)
+
+    if not (disasters or risk_data or hazard_counts):
+        return geo, ""
+    return geo, format_risk_context(disasters, risk_data, hazard_counts)
+
+
+def build_analysis_prompt(project_type: str, location: str, project_size: float, project_budget: float,
+                          fema_context: str = "") -> str:
+    return f"""
+        Please provide a comprehensive analysis for a {project_type} project in {location}.
+        Project Size: {project_size} MW
+        Budget: ${project_budget} million
+        {fema_context}
+
+        Please include:
+        1. ESG Guidelines compliance analysis
+        2. Community sentiment assessment
+        3. Biodiversity impact analysis
+        4. Sustainability recommendations
+        5. Risk assessment and mitigation strategies:
+           - Natural disaster risks
+           - Environmental hazards
+           - Community resilience factors
+           - Infrastructure vulnerabilities
+
+        End with an ESG score breakdown using the specified format.
+        """
+
+
+@dataclass(frozen=True)
+class AnalysisSection:
+    name: str
+    title: str
+    focus: str
+    max_score: Optional[int] = None
+
+
+SECTIONS = [
+    AnalysisSection(
+        'Environmental', 'Environmental Impact',
+        "ESG guidelines compliance, biodiversity impact analysis, impact on the local ecosystem, "
+        "carbon footprint, resource efficiency and sustainability recommendations",
+        max_score=40
+    ),
+    AnalysisSection(
+        'Social', 'Community & Social Impact',
+        "community sentiment assessment, community benefits, job creation and social impact",
+        max_score=30
+    ),
+    AnalysisSection(
+        'Governance', 'Governance & Compliance',
+        "regulatory compliance, permitting, transparency and risk management",
+        max_score=30
+    ),
+    AnalysisSection(
+        'Risk', 'Risk Assessment',
+        "natural disaster risks, environmental hazards, community resilience factors, "
+        "infrastructure vulnerabilities and mitigation strategies"
+    ),
+]
+
+# Each section is a fraction of the single report, so its stream is much shorter
+SECTION_MAX_TOKENS = 600
+
+_section_executor = ThreadPoolExecutor(max_workers=4 * len(SECTIONS), thread_name_prefix="analysis")
+
+
+def build_section_prompt(section: AnalysisSection, project_type: str, location: str, project_size: float,
+                         project_budget: float, fema_context: str = "") -> str:
+    prompt = f"""
+        Please provide the {section.title.lower()} part of an analysis for a {project_type} project in {location}.
+        Project Size: {project_size} MW
+        Budget: ${project_budget} million
+        {fema_context if section.name == 'Risk' else ''}
+
+        Focus only on: {section.focus}.
+        Other sections of the report are written separately; do not repeat them.
+        """
+    if section.max_score is not None:
+        prompt += f"""
+        End with a single line scoring this dimension in the format:
+        {section.name}: X/{section.max_score}
+        """
+    return prompt
+
+
+def stream_sections(prompts: Dict[str, str], client: Optional[openai.Client] = None) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    Run one streamed completion per section concurrently.
+
+    Yields (section, delta) as chunks arrive from any section and (section, None) once a
+    section is done, so the caller (the Streamlit script thread) can render each section
+    into its own placeholder. Wall time is that of the slowest section.
+    """
+    events: queue.Queue = queue.Queue()
+    stop = threading.Event()
+
+    def work(name: str, prompt: str):
+        try:
+            stream = cached_chat_stream(
+                client or openai,
+                model=ANALYSIS_MODEL,
+                messages=[
+                    {"role": "system", "content": consultant_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=ANALYSIS_TEMPERATURE,
+                max_tokens=SECTION_MAX_TOKENS
+            )
+            for chunk in stream:
+                # The consumer went away (e.g. a Streamlit rerun)
+                if stop.is_set():
+                    break
+                if chunk.choices and chunk.choices[0].delta.content is not None:
+                    events.put((name, chunk.choices[0].delta.content))
+        except Exception as e:
+            events.put((name, f"\n\nAn error occurred: {str(e)}"))
+        finally:
+            events.put((name, None))
+
+    for name, prompt in prompts.items():
+        _section_executor.submit(work, name, prompt)
+
+    remaining = len(prompts)
+    try:
+        while remaining:
+            name, delta = events.get()
+            if delta is None:
+                remaining -= 1
+            yield name, delta
+    finally:
+        stop.set()
+
+
+def merge_sections(texts: Dict[str, str]) -> str:
+    """One report from the section texts, ending with an ESG score block built from their sub-scores"""
+    report = "\n\n".join(
+        f"## {section.title}\n\n{texts[section.name].strip()}"
+        for section in SECTIONS if texts.get(section.name)
+    )
+    scores = {
+        section.name: extract_section_score(texts.get(section.name, ''), section.name, section.max_score)
+        for section in SECTIONS if section.max_score is not None
+    }
+    # Without every sub-score there is no total; the report is still returned
+    if any(score is None for score in scores.values()):
+        return report
+    return report + "\n\n" + format_score_block(scores['Environmental'], scores['Social'], scores['Governance'])
+
+
+def build_followup_prompt(project_type: str, location: str, question: str) -> str:
+    return f"""
+                Regarding the previous analysis about the {project_type} project in {location},
+                please answer the following question:
+                {question}
+                """
+
+
+SCORE_REASK_PROMPT = """Score the analysis above. Reply with only the ESG score block, in exactly this
+format, with each score within its maximum and the total equal to their sum:
+[ESG_SCORE]
+Environmental: X/40
+Social: X/30
+Governance: X/30
+Total Score: X/100
+[/ESG_SCORE]"""
+SCORE_REASK_MAX_TOKENS = 80
+
+
+def request_score_block(analysis_text: str, client: Optional[openai.Client] = None) -> str:
+    """Ask again for just the score block of an analysis whose block was missing or invalid"""
+    stream = cached_chat_stream(
+        client or openai,
+        model=ANALYSIS_MODEL,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "assistant", "content": strip_score_block(analysis_text)},
+            {"role": "user", "content": SCORE_REASK_PROMPT}
+        ],
+        temperature=0,
+        max_tokens=SCORE_REASK_MAX_TOKENS,
+        # A re-ask only happens after a failure; a stored block would be replayed for the next one too
+        use_cache=False
+    )
+    return "".join(chunk.choices[0].delta.content or "" for chunk in stream if chunk.choices)
+
+
+def build_messages(user_input: str, history: Optional[List[Dict]] = None) -> List[Dict]:
+    """Chat messages for a request: the prior conversation (which starts with the system prompt) or a new one"""
+    messages = list(history) if history else [{"role": "system", "content": system_prompt}]
+    messages.append({"role": "user", "content": user_input})
+    return messages
+
+
+def create_response_stream(messages: List[Dict], client: Optional[openai.Client] = None,
+                           model: str = ANALYSIS_MODEL, max_tokens: int = ANALYSIS_MAX_TOKENS,
+                           use_cache: bool = True):
+    """Start a streamed chat completion (module-level openai client unless one is passed); cached answers are replayed"""
+    return cached_chat_stream(
+        client or openai,
+        model=model,
+        messages=messages,
+        temperature=ANALYSIS_TEMPERATURE,
+        max_tokens=max_tokens,
+        use_cache=use_cache
+    )
+
+
+def forget_cached_analysis(user_input: str) -> bool:
+    """Drop the cached analysis for this prompt (e.g. its score block failed validation)"""
+    return forget(ANALYSIS_MODEL, build_messages(user_input), ANALYSIS_TEMPERATURE, ANALYSIS_MAX_TOKENS)
+
+
+def get_ai_response(user_input: str,
+                    render: Callable,
+                    history: Optional[List[Dict]] = None,
+                    client: Optional[openai.Client] = None,
+                    use_cache: bool = True) -> Tuple[str, List[Dict]]:
+    """
+    Stream an answer through render and return it with the updated conversation.
+
+    Pass the previous conversation as history for follow-up questions.
+    """
+    messages = build_messages(user_input, history)
+    try:
+        full_response = render(create_response_stream(messages, client, use_cache=use_cache))
+    except Exception as e:
+        return f"An error occurred: {str(e)}", list(history or [])
+    return full_response, messages + [{"role": "assistant", "content": full_response}]
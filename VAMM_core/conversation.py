@@ -0,0 +1,184 @@
+"""
+Token-budgeted context for follow-up questions on an analysis.
+
+The full conversation (system prompt, the analysis, every follow-up) stays in
+session_state for display, but only a compacted copy is sent:
+
+    [system prompt]
+    [memory: rolling summary of the older turns + the analysis' ESG score block]
+    [the last KEEP_TURNS question/answer pairs, verbatim]
+    [the new question]
+
+The rolling summary is computed on a background thread - after each answer, and
+as soon as a request has to leave turns out - so the next question doesn't wait
+for it. Until it is ready the not-yet-summarized turns are sent verbatim, oldest
+dropped first if they don't fit. The last KEEP_TURNS pairs are never dropped; if
+they alone overflow the budget, the oldest messages are truncated instead, so every
+request stays within it. Conversations that fit the budget are sent unchanged.
+"""
+
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import openai
+import tiktoken
+
+from VAMM_core.scoring import SCORE_CAPS, format_score_block, parse_esg_score
+
+TOKEN_BUDGET = int(os.getenv('CONVERSATION_TOKEN_BUDGET', '4000'))
+KEEP_TURNS = int(os.getenv('CONVERSATION_KEEP_TURNS', '2'))
+SUMMARY_MODEL = os.getenv('SUMMARY_MODEL', 'gpt-4')
+SUMMARY_MAX_TOKENS = 400
+TOKENIZER_MODEL = 'gpt-4'
+# Rough English average, used when the tokenizer is unavailable (e.g. offline)
+CHARS_PER_TOKEN = 4
+# Per-message framing tokens in the chat format, plus the reply primer
+MESSAGE_OVERHEAD = 4
+REPLY_OVERHEAD = 3
+TRUNCATION_NOTE = "\n\n[... truncated to fit the context budget]"
+
+SUMMARY_PROMPT = """Summarize this conversation between a renewable energy contractor and their ESG consultant
+so the consultant can keep answering follow-up questions. Keep project facts, figures, risks,
+recommendations and any commitments made; drop pleasantries and repetition. If a previous summary
+is given, fold the new turns into it. Reply with the summary only."""
+
+_summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="summary")
+
+
+@lru_cache(maxsize=None)
+def _encoding():
+    """The tokenizer, or None when it can't be loaded (tiktoken downloads its BPE file on first use)"""
+    try:
+        return tiktoken.encoding_for_model(TOKENIZER_MODEL)
+    except Exception as e:
+        print(f"Error loading tokenizer, estimating tokens from characters: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """The first max_tokens tokens of text"""
+    encoding = _encoding()
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+
+
+def count_message_tokens(messages: List[Dict]) -> int:
+    """Prompt tokens for a list of chat messages"""
+    return sum(count_tokens(message['content']) + MESSAGE_OVERHEAD for message in messages) + REPLY_OVERHEAD
+
+
+def summarize_turns(previous_summary: str, turns: List[Dict], client: Optional[openai.Client] = None) -> str:
+    """Fold conversation turns into the running summary"""
+    transcript = "\n\n".join(f"{message['role'].upper()}: {message['content']}" for message in turns)
+    if previous_summary:
+        transcript = f"PREVIOUS SUMMARY:\n{previous_summary}\n\nNEW TURNS:\n{transcript}"
+    response = (client or openai).chat.completions.create(
+        model=SUMMARY_MODEL,
+        messages=[
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": transcript}
+        ],
+        temperature=0,
+        max_tokens=SUMMARY_MAX_TOKENS
+    )
+    return response.choices[0].message.content.strip()
+
+
+class ConversationMemory:
+    def __init__(self, budget: int = TOKEN_BUDGET, keep_turns: int = KEEP_TURNS,
+                 client: Optional[openai.Client] = None):
+        """
+        Rolling summary of one conversation (messages[0] is the system prompt, then user/assistant pairs)
+        """
+        self.budget = budget
+        self.keep_turns = keep_turns
+        self.client = client
+        self.summary = ""
+        # The summary covers messages[1:1 + summarized]
+        self.summarized = 0
+        self.score_block: Optional[str] = None
+        self._pending: Optional[Future] = None
+        self._pending_upto = 0
+
+    def context(self, messages: List[Dict], user_input: str) -> List[Dict]:
+        """The history to send with user_input: as is if it fits the budget, compacted otherwise"""
+        self._collect()
+        question = [{"role": "user", "content": user_input}]
+        if count_message_tokens(messages + question) <= self.budget:
+            return list(messages)
+
+        system, turns = messages[0], messages[1:]
+        if self.score_block is None:
+            self.score_block = self._find_score_block(turns)
+        # Everything before the verbatim window leaves this request (at least in part), so fold it into the summary
+        window_start = max(0, len(turns) - 2 * self.keep_turns)
+        self._summarize(turns, window_start)
+
+        # Not yet summarized turns go verbatim while they fit, oldest pair dropped first
+        older, recent = turns[self.summarized:window_start], turns[window_start:]
+        while older and count_message_tokens([system, self._memory_message(), *older, *recent] + question) > self.budget:
+            older = older[2:]
+        return self._fit([system, self._memory_message(), *older, *recent], question)
+
+    def update(self, messages: List[Dict]):
+        """After an answer: summarize (in the background) the turns that left the verbatim window"""
+        self._collect()
+        self._summarize(messages[1:], len(messages) - 1 - 2 * self.keep_turns)
+
+    def _summarize(self, turns: List[Dict], upto: int):
+        """Start folding turns[summarized:upto] into the summary, unless a summary is already running"""
+        if self._pending is None and upto > self.summarized:
+            self._pending = _summary_executor.submit(
+                summarize_turns, self.summary, turns[self.summarized:upto], self.client
+            )
+            self._pending_upto = upto
+
+    def _fit(self, context: List[Dict], question: List[Dict]) -> List[Dict]:
+        """Truncate turns oldest first, then the memory message (never the system prompt), until the request fits"""
+        context = list(context)
+        for i in [*range(2, len(context)), 1]:
+            excess = count_message_tokens(context + question) - self.budget
+            if excess <= 0:
+                break
+            content = context[i]['content']
+            keep = count_tokens(content) - excess - count_tokens(TRUNCATION_NOTE)
+            truncated = truncate_tokens(content, keep) + TRUNCATION_NOTE if keep > 0 else TRUNCATION_NOTE.strip()
+            context[i] = {"role": context[i]['role'], "content": truncated}
+        return context
+
+    def _collect(self):
+        if self._pending is None or not self._pending.done():
+            return
+        try:
+            self.summary = self._pending.result()
+            self.summarized = self._pending_upto
+        except Exception as e:
+            print(f"Error summarizing conversation: {e}")
+        self._pending = None
+
+    def _memory_message(self) -> Dict:
+        parts = []
+        if self.summary:
+            parts.append(f"Summary of the earlier conversation:\n{self.summary}")
+        if self.score_block:
+            parts.append(f"ESG score from the analysis:\n{self.score_block}")
+        return {"role": "system", "content": "\n\n".join(parts) or "Earlier turns were omitted."}
+
+    @staticmethod
+    def _find_score_block(turns: List[Dict]) -> Optional[str]:
+        for message in turns:
+            if message['role'] == 'assistant':
+                parser = parse_esg_score(message['content'])
+                if parser.complete:
+                    return format_score_block(*(parser.scores[label] for label in SCORE_CAPS))
+        return None
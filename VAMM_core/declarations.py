@@ -0,0 +1,235 @@
+"""
+Local, incrementally synced copy of OpenFEMA DisasterDeclarationsSummaries.
+
+First run pulls the full dataset; later runs only fetch rows whose lastRefresh is
+newer than the newest row already stored:
+
+    python -m VAMM_core.declarations
+
+Rows are keyed by OpenFEMA id and indexed by county FIPS / state FIPS and declaration date.
+"""
+
+import argparse
+import sqlite3
+import time
+from contextlib import closing
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from VAMM_core.paths import DATA_DIR
+
+DECLARATIONS_URL = "https://www.fema.gov/api/open/v2/DisasterDeclarationsSummaries"
+DECLARATIONS_DB = DATA_DIR / 'fema' / 'declarations.sqlite'
+
+PAGE_SIZE = 10000  # OpenFEMA's maximum $top
+SYNC_TIMEOUT = (5, 120)
+
+FIELDS = [
+    'id', 'disasterNumber', 'state', 'declarationType', 'declarationDate', 'incidentType',
+    'declarationTitle', 'fipsStateCode', 'fipsCountyCode', 'designatedArea', 'lastRefresh',
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS declarations (
+    id TEXT PRIMARY KEY,
+    disaster_number INTEGER,
+    state TEXT,
+    declaration_type TEXT,
+    declaration_date TEXT,
+    incident_type TEXT,
+    declaration_title TEXT,
+    fips_state TEXT,
+    county_fips TEXT,
+    designated_area TEXT,
+    last_refresh TEXT
+);
+CREATE INDEX IF NOT EXISTS declarations_county_date ON declarations (county_fips, declaration_date DESC);
+CREATE INDEX IF NOT EXISTS declarations_state_date ON declarations (fips_state, declaration_date DESC);
+CREATE INDEX IF NOT EXISTS declarations_last_refresh ON declarations (last_refresh);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+UPSERT = """
+INSERT INTO declarations (id, disaster_number, state, declaration_type, declaration_date, incident_type,
+                          declaration_title, fips_state, county_fips, designated_area, last_refresh)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    disaster_number = excluded.disaster_number,
+    state = excluded.state,
+    declaration_type = excluded.declaration_type,
+    declaration_date = excluded.declaration_date,
+    incident_type = excluded.incident_type,
+    declaration_title = excluded.declaration_title,
+    fips_state = excluded.fips_state,
+    county_fips = excluded.county_fips,
+    designated_area = excluded.designated_area,
+    last_refresh = excluded.last_refresh
+"""
+
+
+def _row(record: Dict) -> tuple:
+    fips_state = (record.get('fipsStateCode') or '').zfill(2)
+    fips_county = (record.get('fipsCountyCode') or '').zfill(3)
+    return (
+        record['id'],
+        record.get('disasterNumber'),
+        record.get('state'),
+        record.get('declarationType'),
+        record.get('declarationDate'),
+        record.get('incidentType'),
+        record.get('declarationTitle'),
+        fips_state,
+        fips_state + fips_county,  # county "000" is a statewide designation
+        record.get('designatedArea'),
+        record.get('lastRefresh'),
+    )
+
+
+class DeclarationStore:
+    def __init__(self, path=DECLARATIONS_DB):
+        """
+        Open (and create, if needed) the SQLite declarations store
+        """
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    def count(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM declarations").fetchone()[0]
+
+    def sync(self, session=None, page_size: int = PAGE_SIZE) -> int:
+        """Pull new or refreshed declarations from OpenFEMA; returns the number of rows upserted"""
+        if session is None:
+            from VAMM_core.fema import get_session
+            session = get_session()
+
+        with closing(self._connect()) as conn:
+            last_refresh = conn.execute("SELECT MAX(last_refresh) FROM declarations").fetchone()[0]
+
+        params = {
+            "$select": ",".join(FIELDS),
+            "$orderby": "lastRefresh,id",
+            "$top": page_size,
+        }
+        if last_refresh:
+            # "ge" rather than "gt" so rows sharing the last timestamp are not missed; upserts are idempotent
+            params["$filter"] = f"lastRefresh ge '{last_refresh}'"
+
+        started = time.monotonic()
+        total = 0
+        skip = 0
+        while True:
+            params["$skip"] = skip
+            response = session.get(DECLARATIONS_URL, params=params, timeout=SYNC_TIMEOUT)
+            response.raise_for_status()
+            records = response.json().get('DisasterDeclarationsSummaries', [])
+            if not records:
+                break
+
+            with closing(self._connect()) as conn:
+                with conn:
+                    conn.executemany(UPSERT, [_row(record) for record in records])
+            total += len(records)
+            skip += len(records)
+            print(f"Synced {total} declarations ({time.monotonic() - started:.1f}s)")
+            if len(records) < page_size:
+                break
+
+        with closing(self._connect()) as conn:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO sync_state (key, value) VALUES ('last_sync', ?)",
+                    (datetime.now(timezone.utc).isoformat(),)
+                )
+        return total
+
+    def recent_declarations(self, county_fips: str, limit: int = 5) -> List[Dict]:
+        """Latest disasters declared for a county (including statewide ones), newest first"""
+        statewide = county_fips[:2] + '000'
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                """
+                SELECT disaster_number, MAX(declaration_title), MAX(declaration_date) AS latest,
+                       MAX(incident_type), MAX(designated_area)
+                FROM declarations
+                WHERE county_fips IN (?, ?)
+                GROUP BY disaster_number
+                ORDER BY latest DESC
+                LIMIT ?
+                """,
+                (county_fips, statewide, limit)
+            ).fetchall()
+        return [
+            {
+                'disasterNumber': disaster_number,
+                'declarationTitle': title,
+                'declarationDate': date,
+                'incidentType': incident_type,
+                'designatedArea': area,
+            }
+            for disaster_number, title, date, incident_type, area in rows
+        ]
+
+    def hazard_frequency(self, county_fips: Optional[str] = None, since: Optional[str] = None) -> pd.DataFrame:
+        """
+        Count distinct disasters per county and incident type across the stored history.
+
+        Returns a county_fips x incident_type frame; pass county_fips to restrict it to one county
+        (statewide declarations are counted for the county too).
+        """
+        query = "SELECT county_fips, disaster_number, incident_type, declaration_date FROM declarations"
+        clauses, args = [], []
+        if county_fips:
+            clauses.append("county_fips IN (?, ?)")
+            args += [county_fips, county_fips[:2] + '000']
+        if since:
+            clauses.append("declaration_date >= ?")
+            args.append(since)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+
+        with closing(self._connect()) as conn:
+            frame = pd.read_sql_query(query, conn, params=args)
+        if county_fips:
+            frame['county_fips'] = county_fips
+        # A disaster designates each area once per program; count it once per county
+        frame = frame.drop_duplicates(['county_fips', 'disaster_number'])
+        return pd.crosstab(frame['county_fips'], frame['incident_type'])
+
+    def county_hazard_counts(self, county_fips: str) -> Dict[str, int]:
+        """Disaster counts by incident type for one county, most frequent first"""
+        frequency = self.hazard_frequency(county_fips)
+        if frequency.empty:
+            return {}
+        counts = frequency.iloc[0]
+        counts = counts[counts > 0].sort_values(ascending=False)
+        return {incident_type: int(count) for incident_type, count in counts.items()}
+
+
+@lru_cache(maxsize=None)
+def get_declaration_store() -> Optional[DeclarationStore]:
+    """Process-wide declarations store (None until the first sync has been run)"""
+    if not DECLARATIONS_DB.exists():
+        return None
+    store = DeclarationStore()
+    return store if store.count() else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync OpenFEMA disaster declarations into the local store")
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE)
+    args = parser.parse_args()
+    store = DeclarationStore()
+    upserted = store.sync(page_size=args.page_size)
+    print(f"Upserted {upserted} declarations; {store.count()} stored in {DECLARATIONS_DB}")
@@ -0,0 +1,112 @@
+"""
+Process-wide background event loop for async work started from Streamlit scripts.
+
+Streamlit reruns the page script synchronously on a fresh thread, so calling
+asyncio.run per message creates (and tears down) an event loop each time, along
+with every async HTTP connection pool bound to it. Instead, one daemon thread runs
+a loop for the life of the process:
+
+    loop = get_background_loop()
+    client = loop.resource('openai', lambda: AsyncOpenAI())   # created once, used on the loop
+    answer = loop.run(agent.run(prompt, deps=deps))            # blocks the script thread only
+    for delta in loop.iterate(stream_answer(prompt, deps)):    # async iterator -> sync generator
+        ...
+"""
+
+import asyncio
+import inspect
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Callable, Coroutine, Dict, Iterator, Optional
+
+_DONE = object()
+
+
+class BackgroundLoop:
+    def __init__(self, name: str = 'vamm-event-loop'):
+        """
+        Start an event loop running forever on a daemon thread
+        """
+        self.loop = asyncio.new_event_loop()
+        self._resources: Dict[str, Any] = {}
+        self._resources_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Schedule a coroutine on the loop; returns a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and block the calling thread until it finishes"""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("BackgroundLoop.run would deadlock when called from the loop thread")
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def iterate(self, iterator: AsyncIterator, timeout: Optional[float] = None) -> Iterator:
+        """Consume an async iterator on the loop, yielding its items to the calling (sync) thread"""
+        items: queue.Queue = queue.Queue()
+
+        async def pump():
+            try:
+                async for item in iterator:
+                    items.put((True, item))
+            except BaseException as e:
+                items.put((False, e))
+                raise
+            finally:
+                items.put((True, _DONE))
+
+        future = self.submit(pump())
+        try:
+            while True:
+                ok, item = items.get(timeout=timeout)
+                if not ok:
+                    raise item
+                if item is _DONE:
+                    return
+                yield item
+        finally:
+            # Stops the producer if the consumer bails out early (e.g. a Streamlit rerun)
+            future.cancel()
+
+    def resource(self, name: str, factory: Callable[[], Any]) -> Any:
+        """
+        Process-wide object created once by factory and meant to be used on this loop
+        (async clients whose connection pools must stay on one loop). If factory returns
+        an awaitable (e.g. supabase.acreate_client), it is awaited on the loop.
+        """
+        with self._resources_lock:
+            if name not in self._resources:
+                created = factory()
+                if inspect.isawaitable(created):
+                    created = self.run(created)
+                self._resources[name] = created
+            return self._resources[name]
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+
+_background_loop: Optional[BackgroundLoop] = None
+_background_loop_lock = threading.Lock()
+
+
+def get_background_loop() -> BackgroundLoop:
+    """The process-wide background loop, started on first use"""
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            _background_loop = BackgroundLoop()
+    return _background_loop
@@ -0,0 +1,163 @@
+import concurrent.futures
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from VAMM_core.declarations import get_declaration_store
+from VAMM_core.http_cache import cached_get_json
+from VAMM_core.nri_store import get_nri_store
+
+DISASTERS_URL = "https://www.fema.gov/api/open/v1/DisasterDeclarationsSummaries"
+NRI_URL = "https://hazards.fema.gov/nri/public/api/data/county"
+
+# (connect, read) timeouts per endpoint, in seconds
+DISASTERS_TIMEOUT = (3.05, 8)
+NRI_TIMEOUT = (3.05, 8)
+# Wall-clock budget for the whole fetch; whatever hasn't arrived by then is dropped
+FETCH_DEADLINE = 10
+
+_session = None
+_session_lock = threading.Lock()
+_executor = concurrent.futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix="fema")
+
+
+def get_session() -> requests.Session:
+    """Shared keep-alive session for all FEMA endpoints"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+            session.mount("https://", adapter)
+            session.headers.update({"Accept": "application/json"})
+            _session = session
+    return _session
+
+
+def fetch_disasters(county_fips: Optional[str] = None, state_fips: Optional[str] = None) -> Optional[List[Dict]]:
+    """Get the latest disaster declarations for the county, or statewide when only the state is known"""
+    # Declarations have no coordinates to filter on, only FIPS codes
+    if county_fips:
+        declaration_filter = f"fipsStateCode eq '{county_fips[:2]}' and fipsCountyCode eq '{county_fips[2:]}'"
+    elif state_fips:
+        declaration_filter = f"fipsStateCode eq '{state_fips}'"
+    else:
+        return None
+    params = {
+        "$filter": declaration_filter,
+        "$orderby": "declarationDate desc",
+        "$top": 5
+    }
+    data = cached_get_json('fema_declarations', DISASTERS_URL, params, session=get_session(), timeout=DISASTERS_TIMEOUT)
+    return data.get('DisasterDeclarationsSummaries', [])
+
+
+def fetch_nri(lat: float, lon: float) -> Optional[Dict]:
+    """Get National Risk Index data for the county containing the location"""
+    params = {
+        "latitude": lat,
+        "longitude": lon
+    }
+    return cached_get_json('fema_nri', NRI_URL, params, session=get_session(), timeout=NRI_TIMEOUT)
+
+
+def local_disasters(county_fips: Optional[str]) -> Optional[List[Dict]]:
+    """Latest declarations from the locally synced store, if it has been synced"""
+    store = get_declaration_store()
+    if store is None or not county_fips:
+        return None
+    return store.recent_declarations(county_fips)
+
+
+def local_hazard_counts(county_fips: Optional[str]) -> Optional[Dict[str, int]]:
+    """Historical disaster counts by incident type for the county, from the local store"""
+    store = get_declaration_store()
+    if store is None or not county_fips:
+        return None
+    return store.county_hazard_counts(county_fips)
+
+
+def local_nri(county_fips: Optional[str]) -> Optional[Dict]:
+    """NRI data from the local county store, if it has been imported and the county is known"""
+    store = get_nri_store()
+    # Without a county the NRI API resolves the point itself; guessing one locally could pick a neighbour
+    if store is None or not county_fips:
+        return None
+    return store.get_county(county_fips)
+
+
+def fetch_fema_risks(lat, lon, county_fips: Optional[str] = None, state_fips: Optional[str] = None,
+                     deadline: float = FETCH_DEADLINE) -> Tuple[Optional[List[Dict]], Optional[Dict]]:
+    """
+    Fetch disaster declarations and NRI data concurrently.
+
+    Declarations and NRI data come from the local stores when available; only missing
+    pieces go to FEMA.
+    Returns whatever arrived within the deadline; a slow or failed endpoint yields None
+    for its half instead of blocking the caller.
+    """
+    if lat is None or lon is None:
+        return None, None
+
+    futures = {}
+    disasters = local_disasters(county_fips)
+    if disasters is None and (county_fips or state_fips):
+        futures['disasters'] = _executor.submit(fetch_disasters, county_fips, state_fips)
+    risk_data = local_nri(county_fips)
+    if risk_data is None:
+        futures['risk_data'] = _executor.submit(fetch_nri, lat, lon)
+    if futures:
+        concurrent.futures.wait(futures.values(), timeout=deadline)
+
+    results = {'disasters': disasters, 'risk_data': risk_data}
+    for name, future in futures.items():
+        results[name] = None
+        if not future.done():
+            future.cancel()
+            print(f"FEMA {name} request exceeded {deadline}s, continuing without it")
+            continue
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            print(f"Error fetching FEMA {name}: {str(e)}")
+
+    return results['disasters'], results['risk_data']
+
+
+def format_risk_context(disasters, risk_data, hazard_counts=None) -> str:
+    """Format FEMA risk data into a readable context string"""
+    context = "\nFEMA Risk Analysis:\n"
+    
+    if disasters:
+        context += "\nRecent Disaster Declarations:\n"
+        for disaster in disasters:
+            context += f"- {disaster.get('declarationTitle')} ({disaster.get('declarationDate')})\n"
+    
+    if hazard_counts:
+        context += "\nHistorical Disaster Declarations by Type:\n"
+        for incident_type, count in hazard_counts.items():
+            context += f"- {incident_type}: {count}\n"
+    
+    if risk_data:
+        context += "\nNational Risk Index Data:\n"
+        try:
+            risk_factors = risk_data.get('riskFactors', {})
+            for risk_type, risk_info in risk_factors.items():
+                if isinstance(risk_info, dict):
+                    risk_score = risk_info.get('score', 'N/A')
+                    risk_rating = risk_info.get('rating', 'N/A')
+                    context += f"- {risk_type}: Score {risk_score} ({risk_rating})\n"
+            
+            # Add overall risk scores
+            overall = risk_data.get('overall', {})
+            context += "\nOverall Risk Metrics:\n"
+            context += f"- Risk Score: {overall.get('riskScore', 'N/A')}\n"
+            context += f"- Risk Rating: {overall.get('riskRating', 'N/A')}\n"
+            context += f"- Resilience Score: {overall.get('resilienceScore', 'N/A')}\n"
+            
+        except Exception as e:
+            context += f"Error parsing risk data: {str(e)}\n"
+    
+    return context
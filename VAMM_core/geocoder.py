@@ -0,0 +1,376 @@
+"""
+Offline geocoder built from the Census Gazetteer files.
+
+Build the index once (files from https://www.census.gov/geographies/reference-files/time-series/geo/gazetteer-files.html
+and the place-county relationship file from
+https://www.census.gov/geographies/reference-files/time-series/geo/relationship-files.html):
+
+    python -m VAMM_core.geocoder --places 2023_Gaz_place_national.txt --counties 2023_Gaz_counties_national.txt \
+        --place-counties tab20_place20_county20_natl.txt
+
+Each place's county is the one holding most of its land area, per the relationship file.
+
+Lookups binary-search a memory-mapped, sorted "state|name" key array, so an exact
+"City, ST" hit costs a handful of page reads. Nominatim is only used for misses.
+"""
+
+import argparse
+import difflib
+import re
+import unicodedata
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from VAMM_core.http_cache import get_cache, make_key
+from VAMM_core.paths import DATA_DIR
+
+GAZETTEER_DIR = DATA_DIR / 'gazetteer'
+INDEX_FILE = 'index.npy'
+
+KIND_PLACE = 0
+KIND_COUNTY = 1
+
+INDEX_DTYPE = np.dtype([
+    ('key', 'S64'),
+    ('name', 'S96'),
+    ('state', 'S2'),
+    ('place_fips', 'S7'),
+    ('county_fips', 'S5'),
+    ('latitude', '<f4'),
+    ('longitude', '<f4'),
+    ('kind', 'u1'),
+])
+
+STATE_ABBREVIATIONS = {
+    'alabama': 'AL', 'alaska': 'AK', 'arizona': 'AZ', 'arkansas': 'AR', 'california': 'CA',
+    'colorado': 'CO', 'connecticut': 'CT', 'delaware': 'DE', 'district of columbia': 'DC',
+    'florida': 'FL', 'georgia': 'GA', 'hawaii': 'HI', 'idaho': 'ID', 'illinois': 'IL',
+    'indiana': 'IN', 'iowa': 'IA', 'kansas': 'KS', 'kentucky': 'KY', 'louisiana': 'LA',
+    'maine': 'ME', 'maryland': 'MD', 'massachusetts': 'MA', 'michigan': 'MI', 'minnesota': 'MN',
+    'mississippi': 'MS', 'missouri': 'MO', 'montana': 'MT', 'nebraska': 'NE', 'nevada': 'NV',
+    'new hampshire': 'NH', 'new jersey': 'NJ', 'new mexico': 'NM', 'new york': 'NY',
+    'north carolina': 'NC', 'north dakota': 'ND', 'ohio': 'OH', 'oklahoma': 'OK', 'oregon': 'OR',
+    'pennsylvania': 'PA', 'rhode island': 'RI', 'south carolina': 'SC', 'south dakota': 'SD',
+    'tennessee': 'TN', 'texas': 'TX', 'utah': 'UT', 'vermont': 'VT', 'virginia': 'VA',
+    'washington': 'WA', 'west virginia': 'WV', 'wisconsin': 'WI', 'wyoming': 'WY',
+    'puerto rico': 'PR',
+}
+
+STATE_FIPS = {
+    'AL': '01', 'AK': '02', 'AZ': '04', 'AR': '05', 'CA': '06', 'CO': '08', 'CT': '09', 'DE': '10',
+    'DC': '11', 'FL': '12', 'GA': '13', 'HI': '15', 'ID': '16', 'IL': '17', 'IN': '18', 'IA': '19',
+    'KS': '20', 'KY': '21', 'LA': '22', 'ME': '23', 'MD': '24', 'MA': '25', 'MI': '26', 'MN': '27',
+    'MS': '28', 'MO': '29', 'MT': '30', 'NE': '31', 'NV': '32', 'NH': '33', 'NJ': '34', 'NM': '35',
+    'NY': '36', 'NC': '37', 'ND': '38', 'OH': '39', 'OK': '40', 'OR': '41', 'PA': '42', 'RI': '44',
+    'SC': '45', 'SD': '46', 'TN': '47', 'TX': '48', 'UT': '49', 'VT': '50', 'VA': '51', 'WA': '53',
+    'WV': '54', 'WI': '55', 'WY': '56', 'PR': '72',
+}
+
+# Legal/statistical area descriptions the gazetteer appends to place names ("Austin city")
+PLACE_SUFFIXES = [
+    ' consolidated government (balance)',
+    ' metropolitan government (balance)',
+    ' unified government (balance)',
+    ' metro government (balance)',
+    ' city and borough',
+    ' city (balance)',
+    ' (balance)',
+    ' urban county',
+    ' municipality',
+    ' zona urbana',
+    ' comunidad',
+    ' plantation',
+    ' borough',
+    ' village',
+    ' town',
+    ' city',
+    ' cdp',
+]
+
+ABBREVIATIONS = {'st': 'saint', 'ste': 'sainte', 'ft': 'fort', 'mt': 'mount'}
+
+
+@dataclass(frozen=True)
+class GeocodeResult:
+    latitude: float
+    longitude: float
+    name: str
+    state: Optional[str] = None
+    place_fips: Optional[str] = None
+    county_fips: Optional[str] = None
+    source: str = 'gazetteer'
+
+    @property
+    def state_fips(self) -> Optional[str]:
+        """Two-digit state FIPS code, from the place/county codes or the state abbreviation"""
+        fips = self.county_fips or self.place_fips
+        if fips:
+            return fips[:2]
+        return STATE_FIPS.get(self.state.upper()) if self.state else None
+
+
+def strip_place_suffix(name: str) -> str:
+    """Drop the gazetteer's trailing place description, if any"""
+    lowered = name.lower()
+    for suffix in PLACE_SUFFIXES:
+        if lowered.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a place name for matching: ASCII, lower case, no punctuation, expanded abbreviations"""
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii')
+    name = re.sub(r"[^a-z0-9 ]+", ' ', name.lower().replace("'", ''))
+    return ' '.join(ABBREVIATIONS.get(token, token) for token in name.split())
+
+
+def parse_location(location: str) -> Tuple[str, Optional[str]]:
+    """Split "City, ST" (or "City, State Name") into a name and a two-letter state code"""
+    parts = [part.strip() for part in location.split(',') if part.strip()]
+    if not parts:
+        return '', None
+    if len(parts) >= 2:
+        state = _state_code(parts[-1])
+        if state:
+            return ', '.join(parts[:-1]), state
+        return ', '.join(parts), None
+    # "Austin TX" without a comma
+    head, _, tail = parts[0].rpartition(' ')
+    state = _state_code(tail) if head else None
+    if state:
+        return head, state
+    return parts[0], None
+
+
+def _state_code(text: str) -> Optional[str]:
+    text = text.strip().rstrip('.')
+    if len(text) == 2 and text.upper() in STATE_ABBREVIATIONS.values():
+        return text.upper()
+    return STATE_ABBREVIATIONS.get(text.lower())
+
+
+def _make_key(state: str, name: str) -> bytes:
+    return f"{state.lower()}|{name}".encode('ascii')[:INDEX_DTYPE['key'].itemsize]
+
+
+class GazetteerIndex:
+    def __init__(self, records: np.ndarray):
+        """
+        Wrap a sorted (usually memory-mapped) gazetteer record array
+        """
+        self.records = records
+        self.keys = records['key']
+
+    @classmethod
+    def load(cls, directory=GAZETTEER_DIR) -> Optional['GazetteerIndex']:
+        """Memory-map a previously built index, or return None if it hasn't been built"""
+        path = directory / INDEX_FILE
+        if not path.exists():
+            return None
+        return cls(np.load(path, mmap_mode='r'))
+
+    def lookup(self, location: str, fuzzy: bool = True) -> Optional[GeocodeResult]:
+        """Resolve "City, ST" to coordinates and FIPS codes"""
+        name, state = parse_location(location)
+        if not name or not state:
+            return None
+
+        normalized = normalize_name(name)
+        candidates = [normalized]
+        stripped = normalize_name(strip_place_suffix(name))
+        if stripped != normalized:
+            candidates.append(stripped)
+
+        for candidate in candidates:
+            idx = self._exact(state, candidate)
+            if idx is not None:
+                return self._result(idx)
+
+        if fuzzy:
+            idx = self._fuzzy(state, normalized)
+            if idx is not None:
+                return self._result(idx)
+        return None
+
+    def _exact(self, state: str, name: str) -> Optional[int]:
+        key = _make_key(state, name)
+        idx = int(np.searchsorted(self.keys, key, side='left'))
+        if idx < len(self.keys) and self.keys[idx] == key:
+            return idx
+        return None
+
+    def _fuzzy(self, state: str, name: str) -> Optional[int]:
+        lo, names = self._state_names(state)
+        matches = difflib.get_close_matches(name, names, n=1, cutoff=0.85)
+        if not matches:
+            return None
+        return lo + names.index(matches[0])
+
+    @lru_cache(maxsize=64)
+    def _state_names(self, state: str) -> Tuple[int, List[str]]:
+        prefix = _make_key(state, '')
+        lo = int(np.searchsorted(self.keys, prefix, side='left'))
+        hi = int(np.searchsorted(self.keys, prefix + b'\xff', side='left'))
+        return lo, [key.decode('ascii').split('|', 1)[1] for key in self.keys[lo:hi]]
+
+    def _result(self, idx: int) -> GeocodeResult:
+        record = self.records[idx]
+        return GeocodeResult(
+            latitude=float(record['latitude']),
+            longitude=float(record['longitude']),
+            name=record['name'].decode('utf-8', 'ignore'),
+            state=record['state'].decode('ascii'),
+            place_fips=record['place_fips'].decode('ascii') or None,
+            county_fips=record['county_fips'].decode('ascii') or None,
+        )
+
+
+def _read_gazetteer(path):
+    import pandas as pd
+
+    try:
+        frame = pd.read_csv(path, sep='\t', dtype=str, encoding='utf-8')
+    except UnicodeDecodeError:
+        # Older gazetteer vintages are Latin-1 encoded
+        frame = pd.read_csv(path, sep='\t', dtype=str, encoding='latin-1')
+    frame.columns = [column.strip() for column in frame.columns]
+    frame['INTPTLAT'] = frame['INTPTLAT'].astype(float)
+    frame['INTPTLONG'] = frame['INTPTLONG'].astype(float)
+    return frame
+
+
+def _read_place_counties(path) -> dict:
+    """Place GEOID -> the county holding most of its land area, from the Census place-county relationship file"""
+    import pandas as pd
+
+    with open(path, encoding='utf-8', errors='replace') as f:
+        header = f.readline()
+    # The 2020 files are pipe delimited, older vintages tab delimited
+    frame = pd.read_csv(path, sep='|' if '|' in header else '\t', dtype=str, encoding='latin-1')
+    frame.columns = [column.strip() for column in frame.columns]
+
+    def column(prefix):
+        return next(name for name in frame.columns if name.upper().startswith(prefix))
+
+    place, county, land = column('GEOID_PLACE'), column('GEOID_COUNTY'), column('AREALAND_PART')
+    frame[land] = pd.to_numeric(frame[land], errors='coerce').fillna(0)
+    # A place spanning several counties gets the one with the largest share of its land
+    largest = frame.sort_values(land, ascending=False).drop_duplicates(place)
+    return dict(zip(largest[place], largest[county]))
+
+
+def build_gazetteer_index(places_path, counties_path, place_counties_path, directory=GAZETTEER_DIR) -> int:
+    """Build the sorted, memory-mappable index from gazetteer place and county files and the place-county file"""
+    places = _read_gazetteer(places_path).reset_index(drop=True)
+    counties = _read_gazetteer(counties_path)
+    place_counties = _read_place_counties(place_counties_path)
+
+    place_records = np.zeros(len(places), dtype=INDEX_DTYPE)
+    place_records['key'] = [
+        _make_key(state, normalize_name(strip_place_suffix(name)))
+        for state, name in zip(places['USPS'], places['NAME'])
+    ]
+    place_records['name'] = [name.encode('utf-8')[:96] for name in places['NAME']]
+    place_records['state'] = places['USPS'].to_numpy(dtype='S2')
+    place_records['place_fips'] = places['GEOID'].to_numpy(dtype='S7')
+    # Places missing from the relationship file get no county rather than a guessed one
+    place_records['county_fips'] = [place_counties.get(geoid, '') for geoid in places['GEOID']]
+    place_records['latitude'] = places['INTPTLAT'].to_numpy()
+    place_records['longitude'] = places['INTPTLONG'].to_numpy()
+    place_records['kind'] = KIND_PLACE
+
+    county_records = np.zeros(len(counties), dtype=INDEX_DTYPE)
+    county_records['key'] = [
+        _make_key(state, normalize_name(name)) for state, name in zip(counties['USPS'], counties['NAME'])
+    ]
+    county_records['name'] = [name.encode('utf-8')[:96] for name in counties['NAME']]
+    county_records['state'] = counties['USPS'].to_numpy(dtype='S2')
+    county_records['county_fips'] = counties['GEOID'].to_numpy(dtype='S5')
+    county_records['latitude'] = counties['INTPTLAT'].to_numpy()
+    county_records['longitude'] = counties['INTPTLONG'].to_numpy()
+    county_records['kind'] = KIND_COUNTY
+
+    records = np.concatenate([place_records, county_records])
+    # Sort by key; on duplicate names places win over counties, larger places over smaller ones
+    land = np.concatenate([places['ALAND'].astype(float), counties['ALAND'].astype(float)])
+    records = records[np.lexsort((-land, records['kind'], records['key']))]
+
+    directory.mkdir(parents=True, exist_ok=True)
+    np.save(directory / INDEX_FILE, records)
+    get_gazetteer.cache_clear()
+    return len(records)
+
+
+@lru_cache(maxsize=None)
+def get_gazetteer() -> Optional[GazetteerIndex]:
+    """Process-wide gazetteer index (None until build_gazetteer_index has been run)"""
+    index = GazetteerIndex.load()
+    if index is None:
+        print(f"Gazetteer index not found in {GAZETTEER_DIR}; geocoding will use Nominatim only")
+    return index
+
+
+_nominatim = None
+
+
+def _geocode_nominatim(location: str) -> Optional[GeocodeResult]:
+    key = make_key('geocode', 'nominatim', {'q': location})
+    cached = get_cache().get('geocode', key)
+    if cached is not None:
+        return GeocodeResult(**cached)
+
+    result = _query_nominatim(location)
+    if result is not None:
+        get_cache().set('geocode', key, asdict(result))
+    return result
+
+
+def _query_nominatim(location: str) -> Optional[GeocodeResult]:
+    global _nominatim
+    if _nominatim is None:
+        from geopy.extra.rate_limiter import RateLimiter
+        from geopy.geocoders import Nominatim
+
+        # Nominatim's usage policy allows at most one request per second
+        _nominatim = RateLimiter(
+            Nominatim(user_agent="renewable_energy_consultant").geocode,
+            min_delay_seconds=1
+        )
+    location_data = _nominatim(location)
+    if location_data:
+        return GeocodeResult(
+            latitude=location_data.latitude,
+            longitude=location_data.longitude,
+            name=location_data.address,
+            state=parse_location(location)[1],
+            source='nominatim',
+        )
+    return None
+
+
+def geocode(location: str) -> Optional[GeocodeResult]:
+    """Geocode a location string, using the local gazetteer first and Nominatim for misses"""
+    index = get_gazetteer()
+    if index is not None:
+        result = index.lookup(location)
+        if result is not None:
+            return result
+    try:
+        return _geocode_nominatim(location)
+    except Exception as e:
+        print(f"Error getting coordinates: {str(e)}")
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the offline gazetteer geocoding index")
+    parser.add_argument('--places', required=True, help="Census Gazetteer places file (tab separated)")
+    parser.add_argument('--counties', required=True, help="Census Gazetteer counties file (tab separated)")
+    parser.add_argument('--place-counties', required=True, help="Census place-county relationship file")
+    args = parser.parse_args()
+    count = build_gazetteer_index(args.places, args.counties, args.place_counties)
+    print(f"Wrote {count} gazetteer records to {GAZETTEER_DIR / INDEX_FILE}")
@@ -0,0 +1,195 @@
+"""
+Shared response cache for external API calls (FEMA, Census, geocoding, LLM completions).
+
+Entries live in SQLite so they survive restarts and are shared by every Streamlit
+session and app process on the host. Each source has its own TTL, the whole cache is
+bounded by an LRU entry limit, and hit/miss counters are kept per source.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Optional
+
+import requests
+
+from VAMM_core.paths import DATA_DIR
+
+CACHE_DB = DATA_DIR / 'cache' / 'http_cache.sqlite'
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+# Seconds an entry stays fresh, per source
+DEFAULT_TTLS = {
+    'fema_declarations': 6 * HOUR,
+    'fema_nri': 30 * DAY,
+    'geocode': 30 * DAY,
+    'census': 30 * DAY,
+    # Chat completions (see llm_cache.py); a week, so answers pick up model updates
+    'llm': 7 * DAY,
+}
+DEFAULT_TTL = DAY
+MAX_ENTRIES = 20000
+
+# Coordinates are snapped to this grid (degrees, ~1 km) so nearby points share entries
+COORDINATE_GRID = 0.01
+COORDINATE_PARAMS = {'lat', 'lon', 'latitude', 'longitude'}
+# Never part of the key: credentials
+SECRET_PARAMS = {'key', 'api_key', 'token'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+"""
+
+
+def _normalize(name: str, value: Any) -> Any:
+    if name.lower() in COORDINATE_PARAMS and isinstance(value, (int, float)):
+        return round(round(value / COORDINATE_GRID) * COORDINATE_GRID, 6)
+    if isinstance(value, str):
+        return ' '.join(value.split()).lower()
+    return value
+
+
+def make_key(source: str, url: str = '', params: Optional[Dict] = None) -> str:
+    """Stable cache key: source + URL + normalized params (coordinates snapped, secrets dropped)"""
+    normalized = {
+        name: _normalize(name, value)
+        for name, value in (params or {}).items()
+        if name.lower() not in SECRET_PARAMS
+    }
+    payload = json.dumps([source, url, normalized], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path=CACHE_DB, ttls: Optional[Dict[str, float]] = None, max_entries: int = MAX_ENTRIES):
+        """
+        Open (and create, if needed) the SQLite-backed response cache
+        """
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.max_entries = max_entries
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def get(self, source: str, key: str) -> Optional[Any]:
+        """Cached value for key, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] < now:
+                self.misses[source] += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self.hits[source] += 1
+        return json.loads(row[0])
+
+    def set(self, source: str, key: str, value: Any):
+        now = time.time()
+        ttl = self.ttls.get(source, DEFAULT_TTL)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, source, value, expires, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, source, json.dumps(value), now + ttl, now)
+            )
+            self._writes += 1
+            # Evicting on every write would make each set O(n); amortize it
+            if self._writes % 100 == 0:
+                self._evict(now)
+
+    def delete(self, key: str) -> bool:
+        """Remove key; returns whether it was stored"""
+        with self._lock:
+            return self._conn.execute("DELETE FROM responses WHERE key = ?", (key,)).rowcount > 0
+
+    def get_or_fetch(self, source: str, key: str, fetch: Callable[[], Any]) -> Any:
+        """Return the cached value or call fetch() and cache its result (None results are not cached)"""
+        value = self.get(source, key)
+        if value is not None:
+            return value
+        value = fetch()
+        if value is not None:
+            self.set(source, key, value)
+        return value
+
+    def _evict(self, now: float):
+        self._conn.execute("DELETE FROM responses WHERE expires < ?", (now,))
+        self._conn.execute(
+            """
+            DELETE FROM responses WHERE key IN (
+                SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entries,)
+        )
+
+    def clear(self, source: Optional[str] = None):
+        with self._lock:
+            if source is None:
+                self._conn.execute("DELETE FROM responses")
+            else:
+                self._conn.execute("DELETE FROM responses WHERE source = ?", (source,))
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit/miss counters (this process) and stored entry counts, per source"""
+        with self._lock:
+            entries = dict(self._conn.execute("SELECT source, COUNT(*) FROM responses GROUP BY source").fetchall())
+        sources = set(entries) | set(self.hits) | set(self.misses)
+        return {
+            source: {
+                'hits': self.hits[source],
+                'misses': self.misses[source],
+                'entries': entries.get(source, 0),
+            }
+            for source in sorted(sources)
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ResponseCache:
+    """Process-wide response cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+    return _cache
+
+
+def cached_get_json(source: str, url: str, params: Optional[Dict] = None, session=None, timeout=None) -> Any:
+    """
+    GET a JSON endpoint through the response cache.
+
+    Non-2xx responses raise requests.HTTPError and are not cached.
+    """
+    if session is None:
+        session = requests
+
+    def fetch():
+        response = session.get(url, params=params, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    return get_cache().get_or_fetch(source, make_key(source, url, params), fetch)
@@ -0,0 +1,89 @@
+"""
+Exact-match cache for streamed chat completions.
+
+Completions are stored in the shared response cache (source 'llm', so the TTL and
+LRU size limit in http_cache.py apply) under a key made from the model, messages,
+temperature and max_tokens. A hit is replayed as a stream of chunks shaped like the
+OpenAI ones, so the same renderer (stream_llm_response) displays it - instantly:
+
+    response = cached_chat_stream(openai, model="gpt-4", messages=messages, temperature=0.7, max_tokens=1500)
+    full_response = stream_llm_response(response)
+
+Only streams that ran to completion with finish_reason 'stop' are stored; one cut
+short (by a Streamlit rerun or max_tokens) is not. Pass use_cache=False (or set
+LLM_CACHE=0) to bypass the cache, and forget() a stored completion that turned out
+to be unusable.
+"""
+
+import os
+from types import SimpleNamespace
+from typing import Dict, Iterator, List, Optional
+
+from VAMM_core.http_cache import get_cache, make_key
+
+SOURCE = 'llm'
+ENABLED = os.getenv('LLM_CACHE', '1') != '0'
+# Characters per replayed chunk
+REPLAY_CHUNK_CHARS = 64
+
+
+def completion_key(model: str, messages: List[Dict], temperature: float, max_tokens: Optional[int]) -> str:
+    return make_key(SOURCE, params={
+        'model': model,
+        'messages': messages,
+        'temperature': temperature,
+        'max_tokens': max_tokens,
+    })
+
+
+def forget(model: str, messages: List[Dict], temperature: float, max_tokens: Optional[int]) -> bool:
+    """Drop the cached completion for this request; returns whether there was one"""
+    return ENABLED and get_cache().delete(completion_key(model, messages, temperature, max_tokens))
+
+
+def _chunk(content: Optional[str], finish_reason: Optional[str] = None) -> SimpleNamespace:
+    delta = SimpleNamespace(content=content, role='assistant')
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=finish_reason, index=0)])
+
+
+def replay(text: str, finish_reason: Optional[str] = 'stop') -> Iterator[SimpleNamespace]:
+    """A cached completion as a chat completion chunk stream"""
+    for start in range(0, len(text), REPLAY_CHUNK_CHARS):
+        yield _chunk(text[start:start + REPLAY_CHUNK_CHARS])
+    yield _chunk(None, finish_reason)
+
+
+def _record(key: str, stream) -> Iterator:
+    """Pass the live stream through, storing the full text once it has been consumed to the end"""
+    parts = []
+    finish_reason = None
+    for chunk in stream:
+        if chunk.choices:
+            choice = chunk.choices[0]
+            if choice.delta.content is not None:
+                parts.append(choice.delta.content)
+            finish_reason = choice.finish_reason or finish_reason
+        yield chunk
+    # A completion cut off by max_tokens or a content filter is not worth replaying
+    if parts and finish_reason == 'stop':
+        get_cache().set(SOURCE, key, {'content': ''.join(parts), 'finish_reason': finish_reason})
+
+
+def cached_chat_stream(client, model: str, messages: List[Dict], temperature: float = 0.7,
+                       max_tokens: Optional[int] = None, use_cache: bool = True) -> Iterator:
+    """
+    Streamed chat completion through the cache.
+
+    client is anything with .chat.completions.create (an openai.Client or the openai module).
+    """
+    request = {'model': model, 'messages': messages, 'temperature': temperature}
+    if max_tokens is not None:
+        request['max_tokens'] = max_tokens
+    if not (ENABLED and use_cache):
+        return client.chat.completions.create(stream=True, **request)
+
+    key = completion_key(model, messages, temperature, max_tokens)
+    cached = get_cache().get(SOURCE, key)
+    if cached is not None:
+        return replay(cached['content'], cached.get('finish_reason'))
+    return _record(key, client.chat.completions.create(stream=True, **request))
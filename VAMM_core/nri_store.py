@@ -0,0 +1,122 @@
+"""
+Local copy of the FEMA National Risk Index county table.
+
+Import the published county CSV (https://hazards.fema.gov/nri/data-resources) once:
+
+    python -m VAMM_core.nri_store NRI_Table_Counties.csv
+
+The table is stored as Parquet keyed by county FIPS and loaded into a dict on first
+use, so risk lookups are in-memory reads instead of calls to the NRI API.
+"""
+
+import argparse
+from functools import lru_cache
+from typing import Dict, Optional
+
+import pandas as pd
+
+from VAMM_core.paths import DATA_DIR
+
+NRI_DIR = DATA_DIR / 'nri'
+NRI_FILE = 'nri_counties.parquet'
+
+# NRI column prefix -> hazard name
+HAZARDS = {
+    'AVLN': 'Avalanche',
+    'CFLD': 'Coastal Flooding',
+    'CWAV': 'Cold Wave',
+    'DRGT': 'Drought',
+    'ERQK': 'Earthquake',
+    'HAIL': 'Hail',
+    'HWAV': 'Heat Wave',
+    'HRCN': 'Hurricane',
+    'ISTM': 'Ice Storm',
+    'LNDS': 'Landslide',
+    'LTNG': 'Lightning',
+    'RFLD': 'Riverine Flooding',
+    'SWND': 'Strong Wind',
+    'TRND': 'Tornado',
+    'TSUN': 'Tsunami',
+    'VLCN': 'Volcanic Activity',
+    'WFIR': 'Wildfire',
+    'WNTW': 'Winter Weather',
+}
+
+BASE_COLUMNS = ['STCOFIPS', 'STATEABBRV', 'COUNTY', 'NRI_VER', 'RISK_SCORE', 'RISK_RATNG', 'RESL_SCORE', 'RESL_RATNG']
+
+
+def import_nri_csv(csv_path, directory=NRI_DIR) -> int:
+    """Convert the published NRI county CSV into the local Parquet store"""
+    hazard_columns = [f"{prefix}_{suffix}" for prefix in HAZARDS for suffix in ('RISKS', 'RISKR')]
+    frame = pd.read_csv(csv_path, dtype={'STCOFIPS': str}, low_memory=False)
+    columns = [column for column in BASE_COLUMNS + hazard_columns if column in frame.columns]
+    frame = frame[columns]
+    frame['STCOFIPS'] = frame['STCOFIPS'].str.zfill(5)
+
+    directory.mkdir(parents=True, exist_ok=True)
+    frame.to_parquet(directory / NRI_FILE, index=False)
+    get_nri_store.cache_clear()
+    return len(frame)
+
+
+def _value(value):
+    return None if pd.isna(value) else value
+
+
+class NRIStore:
+    def __init__(self, frame: pd.DataFrame):
+        """
+        Index the NRI county table by five-digit county FIPS
+        """
+        self.rows = frame.set_index('STCOFIPS').to_dict('index')
+        self.version = str(frame['NRI_VER'].iloc[0]) if 'NRI_VER' in frame.columns and len(frame) else None
+
+    @classmethod
+    def load(cls, directory=NRI_DIR) -> Optional['NRIStore']:
+        path = directory / NRI_FILE
+        if not path.exists():
+            return None
+        return cls(pd.read_parquet(path))
+
+    def get_county(self, county_fips: str) -> Optional[Dict]:
+        """Risk data for a county, shaped like the NRI API response format_risk_context expects"""
+        row = self.rows.get(county_fips)
+        if row is None:
+            return None
+
+        risk_factors = {}
+        for prefix, hazard in HAZARDS.items():
+            score = row.get(f"{prefix}_RISKS")
+            if score is None or pd.isna(score):
+                continue
+            risk_factors[hazard] = {
+                'score': _value(score),
+                'rating': _value(row.get(f"{prefix}_RISKR")),
+            }
+
+        return {
+            'countyFips': county_fips,
+            'county': row.get('COUNTY'),
+            'state': row.get('STATEABBRV'),
+            'version': self.version,
+            'riskFactors': risk_factors,
+            'overall': {
+                'riskScore': _value(row.get('RISK_SCORE')),
+                'riskRating': _value(row.get('RISK_RATNG')),
+                'resilienceScore': _value(row.get('RESL_SCORE')),
+            },
+        }
+
+
+@lru_cache(maxsize=None)
+def get_nri_store() -> Optional[NRIStore]:
+    """Process-wide NRI store (None until import_nri_csv has been run)"""
+    return NRIStore.load()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import the NRI county table into the local store")
+    parser.add_argument('csv', help="NRI_Table_Counties.csv from the NRI data resources page")
+    args = parser.parse_args()
+    count = import_nri_csv(args.csv)
+    print(f"Imported {count} counties into {NRI_DIR / NRI_FILE}")
@@ -0,0 +1,6 @@
+import os
+import pathlib
+
+# Locally built indexes, stores and caches live under data/ unless VAMM_DATA_DIR says otherwise
+REPO_DIR = pathlib.Path(__file__).parent.parent.resolve()
+DATA_DIR = pathlib.Path(os.getenv('VAMM_DATA_DIR', str(REPO_DIR / 'data')))
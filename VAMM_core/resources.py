@@ -0,0 +1,157 @@
+"""
+Process-wide registry for heavyweight, thread-safe objects (API clients, stateless agents).
+
+Streamlit re-executes page scripts on every interaction and for every session, so
+anything built at module level is rebuilt constantly. Register a factory once and
+get() it from anywhere: the first caller builds it (under a per-resource lock),
+everyone else - every rerun, every session - gets the same instance.
+
+Only register objects that are safe to share across sessions; per-user state
+(chat history, a SocialMarketingAgent's demographic data) stays in session_state.
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class ResourceInfo:
+    factory: Callable[[], Any]
+    check: Optional[Callable[[Any], Any]] = None
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    value: Any = None
+    warm: bool = False
+    created_at: Optional[float] = None
+    setup_seconds: Optional[float] = None
+    uses: int = 0
+    healthy: Optional[bool] = None
+    last_error: Optional[str] = None
+    checked_at: Optional[float] = None
+
+
+class ResourceRegistry:
+    def __init__(self):
+        """
+        Empty registry; resources are created lazily on first get()
+        """
+        self._resources: Dict[str, ResourceInfo] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any], check: Optional[Callable[[Any], Any]] = None):
+        """Register a factory (and optional health check); re-registering an existing name is a no-op"""
+        with self._lock:
+            if name not in self._resources:
+                self._resources[name] = ResourceInfo(factory=factory, check=check)
+
+    def names(self) -> List[str]:
+        return list(self._resources)
+
+    def get(self, name: str) -> Any:
+        info = self._resources.get(name)
+        if info is None:
+            raise KeyError(f"No resource registered as '{name}'")
+        if not info.warm:
+            with info.lock:
+                # Another thread may have built it while we waited
+                if not info.warm:
+                    started = time.perf_counter()
+                    try:
+                        info.value = info.factory()
+                    except Exception as e:
+                        info.healthy = False
+                        info.last_error = str(e)
+                        raise
+                    info.setup_seconds = time.perf_counter() - started
+                    info.created_at = time.time()
+                    info.healthy = True
+                    info.last_error = None
+                    info.warm = True
+        info.uses += 1
+        return info.value
+
+    def warm(self, names: Optional[List[str]] = None) -> Dict[str, Optional[str]]:
+        """Create resources ahead of first use; returns {name: error or None}"""
+        errors = {}
+        for name in names or self.names():
+            try:
+                self.get(name)
+                errors[name] = None
+            except Exception as e:
+                errors[name] = str(e)
+        return errors
+
+    def check(self, name: str) -> bool:
+        """Run the resource's health check (if any) against the live instance"""
+        info = self._resources[name]
+        try:
+            value = self.get(name)
+            if info.check is not None:
+                info.check(value)
+            info.healthy, info.last_error = True, None
+        except Exception as e:
+            info.healthy, info.last_error = False, str(e)
+        info.checked_at = time.time()
+        return info.healthy
+
+    def health(self) -> List[Dict]:
+        """Warm state, setup cost, use count and last known health of every resource"""
+        return [
+            {
+                'resource': name,
+                'warm': info.warm,
+                'setup_ms': round(info.setup_seconds * 1000, 1) if info.setup_seconds is not None else None,
+                'uses': info.uses,
+                'healthy': info.healthy,
+                'error': info.last_error,
+            }
+            for name, info in self._resources.items()
+        ]
+
+
+def _openai_client():
+    import openai
+    return openai.Client(api_key=os.getenv('OPENAI_API_KEY'))
+
+
+def _supabase_client():
+    from supabase import create_client
+    return create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_KEY'))
+
+
+def _async_openai_client():
+    from openai import AsyncOpenAI
+    from VAMM_core.event_loop import get_background_loop
+    return get_background_loop().resource('openai_async', lambda: AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY')))
+
+
+def _async_supabase_client():
+    from supabase import acreate_client
+    from VAMM_core.event_loop import get_background_loop
+    return get_background_loop().resource(
+        'supabase_async',
+        lambda: acreate_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_KEY'))
+    )
+
+
+_registry: Optional[ResourceRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ResourceRegistry:
+    """Process-wide registry, with the shared OpenAI and Supabase clients registered"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ResourceRegistry()
+            _registry.register('openai', _openai_client, check=lambda client: client.models.list())
+            _registry.register(
+                'supabase', _supabase_client,
+                check=lambda client: client.from_('pdf_pages').select('id').limit(1).execute()
+            )
+            # Async clients are bound to the background event loop (see event_loop.py)
+            _registry.register('openai_async', _async_openai_client)
+            _registry.register('supabase_async', _async_supabase_client)
+    return _registry
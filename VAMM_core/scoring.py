@@ -0,0 +1,184 @@
+"""
+ESG score block handling for analysis responses.
+
+The analysis prompt asks the model to end with:
+
+    [ESG_SCORE]
+    Environmental: X/40
+    Social: X/30
+    Governance: X/30
+    Total Score: X/100
+    [/ESG_SCORE]
+
+ESGScoreParser reads it incrementally, so the score can be shown while the rest of
+the response is still streaming, and checks each sub-score against its cap.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+SCORE_START = "[ESG_SCORE]"
+SCORE_END = "[/ESG_SCORE]"
+
+# Maximum points per dimension; the total is always derived from the three sub-scores
+SCORE_CAPS = {'Environmental': 40, 'Social': 30, 'Governance': 30}
+TOTAL_LABEL = 'Total Score'
+TOTAL_CAP = 100
+
+# "Environmental: 32/40", tolerating list markers, bold on either side of the colon, a
+# parenthetical and spacing ("- **Social**: 24 / 30", "**Environmental:** 32/40",
+# "Environmental (40 points): 32/40")
+SCORE_LINE = re.compile(
+    r"^[\s>*_-]*(Environmental|Social|Governance|Total Score)[*_]*\s*(?:\([^)]*\))?[\s*_]*:[\s*_]*"
+    r"(-?\d+(?:\.\d+)?)[\s*_]*/\s*(\d+(?:\.\d+)?)",
+    re.IGNORECASE
+)
+
+
+class ESGScoreParser:
+    OUTSIDE = 'outside'
+    IN_BLOCK = 'in_block'
+    DONE = 'done'
+
+    def __init__(self):
+        """
+        Streaming parser for the ESG score block: feed() it deltas as they arrive
+        """
+        self.state = self.OUTSIDE
+        self.scores: Dict[str, float] = {}
+        self.reported_total: Optional[float] = None
+        self.errors: List[str] = []
+        self.block_lines: List[str] = []
+        self._pending = ""
+
+    def feed(self, delta: str) -> List[str]:
+        """Consume the next piece of the response; returns the labels parsed from it (possibly none)"""
+        if self.state == self.DONE or not delta:
+            return []
+        self._pending += delta
+        parsed = []
+
+        if self.state == self.OUTSIDE:
+            start = self._pending.find(SCORE_START)
+            if start < 0:
+                # Keep just enough to catch a marker split across deltas
+                self._pending = self._pending[-(len(SCORE_START) - 1):]
+                return parsed
+            self.state = self.IN_BLOCK
+            self._pending = self._pending[start + len(SCORE_START):]
+
+        # Only whole lines are parsed; the last, partial one waits for more text
+        *lines, self._pending = self._pending.split("\n")
+        for line in lines:
+            if self._parse_line(line, parsed):
+                break
+        return parsed
+
+    def close(self) -> List[str]:
+        """End of the response: parse whatever is left of the last line"""
+        parsed = []
+        if self.state == self.IN_BLOCK:
+            self._parse_line(self._pending, parsed)
+            self.state = self.DONE
+        self._pending = ""
+        return parsed
+
+    def _parse_line(self, line: str, parsed: List[str]) -> bool:
+        """Parse one line of the block; returns True when it closes the block"""
+        closing = SCORE_END in line
+        if closing:
+            line = line.split(SCORE_END)[0]
+        if line.strip():
+            self.block_lines.append(line.strip())
+        match = SCORE_LINE.match(line)
+        if match:
+            label = next(name for name in (*SCORE_CAPS, TOTAL_LABEL) if name.lower() == match.group(1).lower())
+            value, out_of = float(match.group(2)), float(match.group(3))
+            if label == TOTAL_LABEL:
+                self.reported_total = value
+                parsed.append(label)
+            elif out_of != SCORE_CAPS[label] or not 0 <= value <= SCORE_CAPS[label]:
+                self.errors.append(f"{label}: {value:g}/{out_of:g} is outside 0-{SCORE_CAPS[label]}")
+            else:
+                self.scores[label] = value
+                parsed.append(label)
+        if closing:
+            self.state = self.DONE
+        return closing
+
+    @property
+    def found(self) -> bool:
+        """The score block has started"""
+        return self.state != self.OUTSIDE
+
+    @property
+    def complete(self) -> bool:
+        """All three sub-scores were read and are within their caps"""
+        return all(label in self.scores for label in SCORE_CAPS)
+
+    @property
+    def total(self) -> Optional[float]:
+        if not self.complete:
+            return None
+        return sum(self.scores[label] for label in SCORE_CAPS)
+
+    @property
+    def score_section(self) -> Optional[str]:
+        """The score block normalized to the standard format (total recomputed from the sub-scores)"""
+        if not self.complete:
+            return None
+        return format_score_lines(*(self.scores[label] for label in SCORE_CAPS))
+
+    def problems(self) -> List[str]:
+        """Why the block could not be used (empty when complete)"""
+        if not self.found:
+            return ["no score block in the response"]
+        missing = [label for label in SCORE_CAPS if label not in self.scores]
+        return self.errors + [f"{label} score missing" for label in missing if not any(
+            error.startswith(label) for error in self.errors
+        )]
+
+
+def parse_esg_score(response: str) -> ESGScoreParser:
+    """A parser that has consumed a complete response"""
+    parser = ESGScoreParser()
+    parser.feed(response)
+    parser.close()
+    return parser
+
+
+def extract_esg_score(response: str) -> Tuple[Optional[float], Optional[str]]:
+    """Total score and the score section, or (None, None) when the block is missing or invalid"""
+    parser = parse_esg_score(response)
+    return parser.total, parser.score_section
+
+
+def strip_score_block(response: str) -> str:
+    """The analysis text without the trailing score block"""
+    return response.split(SCORE_START)[0]
+
+
+def extract_section_score(text: str, name: str, max_score: int) -> Optional[float]:
+    """The last "<name>: X/<max_score>" score in a section's text, capped at max_score"""
+    matches = re.findall(
+        rf"{re.escape(name)}[*_]*\s*(?:\([^)]*\))?[\s*_]*:[\s*_]*(\d+(?:\.\d+)?)[\s*_]*/\s*{max_score}\b",
+        text, re.IGNORECASE
+    )
+    if not matches:
+        return None
+    return min(float(matches[-1]), float(max_score))
+
+
+def format_score_lines(environmental: float, social: float, governance: float) -> str:
+    total = environmental + social + governance
+    return (
+        f"Environmental: {environmental:g}/{SCORE_CAPS['Environmental']}\n"
+        f"Social: {social:g}/{SCORE_CAPS['Social']}\n"
+        f"Governance: {governance:g}/{SCORE_CAPS['Governance']}\n"
+        f"{TOTAL_LABEL}: {total:g}/{TOTAL_CAP}"
+    )
+
+
+def format_score_block(environmental: float, social: float, governance: float) -> str:
+    """An ESG score block in the format the analysis prompt asks for"""
+    return f"{SCORE_START}\n{format_score_lines(environmental, social, governance)}\n{SCORE_END}"
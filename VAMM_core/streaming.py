@@ -0,0 +1,137 @@
+"""
+Rendering of streamed chat completions into Streamlit placeholders.
+
+Re-rendering the placeholder on every delta costs O(n) per chunk (O(n^2) per answer)
+and sends the whole document over the websocket each time. StreamRenderer buffers
+deltas in a list and redraws at most RENDER_FPS times a second, or sooner once
+FLUSH_BYTES of new text is waiting:
+
+    renderer = StreamRenderer()
+    for delta in deltas:
+        renderer.write(delta)
+    text = renderer.finish()
+    renderer.stats   # time to first token, chunks/sec, number of redraws
+
+Pass an ESGScoreParser (and an on_score callback) to stream_llm_response to read the
+ESG score block as it streams; on_score is called with the parser whenever a score
+line has been parsed. The stats of each stream are logged at DEBUG level.
+"""
+
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional
+
+import streamlit as st
+
+from VAMM_core.scoring import ESGScoreParser
+
+logger = logging.getLogger(__name__)
+
+RENDER_FPS = float(os.getenv('STREAM_RENDER_FPS', '12'))
+FLUSH_BYTES = int(os.getenv('STREAM_FLUSH_BYTES', '1024'))
+CURSOR = "▌"
+
+
+@dataclass
+class StreamStats:
+    started: float
+    first_token: Optional[float] = None
+    finished: Optional[float] = None
+    # Stream chunks (deltas), not tokens: a chunk may hold more than one token
+    chunks: int = 0
+    chars: int = 0
+    flushes: int = 0
+
+    @property
+    def ttft(self) -> Optional[float]:
+        """Seconds from the start of the stream to its first token"""
+        return self.first_token - self.started if self.first_token is not None else None
+
+    @property
+    def chunks_per_second(self) -> Optional[float]:
+        """Chunk rate after the first token"""
+        if self.first_token is None or self.finished is None or self.finished <= self.first_token:
+            return None
+        return self.chunks / (self.finished - self.first_token)
+
+    def summary(self) -> str:
+        ttft = f"{self.ttft * 1000:.0f} ms" if self.ttft is not None else "-"
+        rate = f"{self.chunks_per_second:.1f}" if self.chunks_per_second is not None else "-"
+        return f"TTFT {ttft}, {self.chunks} chunks at {rate} chunks/sec, {self.flushes} redraws"
+
+
+class StreamRenderer:
+    def __init__(self, placeholder=None, fps: float = RENDER_FPS, flush_bytes: int = FLUSH_BYTES):
+        """
+        Throttled renderer for a stream of text deltas (a new st.empty() unless a placeholder is given)
+        """
+        self.placeholder = placeholder if placeholder is not None else st.empty()
+        self.interval = 1 / fps if fps > 0 else 0
+        self.flush_bytes = flush_bytes
+        self.stats = StreamStats(started=time.perf_counter())
+        self._parts: List[str] = []
+        self._pending_bytes = 0
+        self._last_flush = 0.0
+
+    def write(self, delta: str):
+        if not delta:
+            return
+        now = time.perf_counter()
+        if self.stats.first_token is None:
+            self.stats.first_token = now
+        self.stats.chunks += 1
+        self.stats.chars += len(delta)
+        self._parts.append(delta)
+        self._pending_bytes += len(delta)
+        # The first token is drawn straight away; after that, at most once per frame
+        if self.stats.flushes == 0 or now - self._last_flush >= self.interval or self._pending_bytes >= self.flush_bytes:
+            self.flush(now)
+
+    def flush(self, now: Optional[float] = None, final: bool = False):
+        text = self.text
+        self.placeholder.markdown(text if final else text + CURSOR)
+        self.stats.flushes += 1
+        self._pending_bytes = 0
+        self._last_flush = now if now is not None else time.perf_counter()
+
+    @property
+    def text(self) -> str:
+        # Joined only when drawn, not per delta
+        if len(self._parts) > 1:
+            self._parts = [''.join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def finish(self) -> str:
+        """Draw the final text (without the cursor) and return it"""
+        self.stats.finished = time.perf_counter()
+        self.flush(self.stats.finished, final=True)
+        return self.text
+
+    def render(self, deltas: Iterable[str]) -> str:
+        for delta in deltas:
+            self.write(delta)
+        return self.finish()
+
+
+def completion_deltas(response) -> Iterable[str]:
+    """The text deltas of an OpenAI chat completion stream"""
+    for chunk in response:
+        if chunk.choices and chunk.choices[0].delta.content is not None:
+            yield chunk.choices[0].delta.content
+
+
+def stream_llm_response(response, placeholder=None, score_parser: Optional[ESGScoreParser] = None,
+                        on_score: Optional[Callable[[ESGScoreParser], None]] = None) -> str:
+    """Render an OpenAI chat completion stream as it arrives and return the full text"""
+    renderer = StreamRenderer(placeholder)
+    for delta in completion_deltas(response):
+        renderer.write(delta)
+        if score_parser is not None and score_parser.feed(delta) and on_score:
+            on_score(score_parser)
+    full_response = renderer.finish()
+    if score_parser is not None and score_parser.close() and on_score:
+        on_score(score_parser)
+    logger.debug("Streamed response: %s", renderer.stats.summary())
+    return full_response
@@ -0,0 +1,58 @@
+"""
+Background warm-up of the heavy agent stacks.
+
+The dashboard imports each agent stack inside the functions that use it, so a page
+load only pays for Streamlit and the OpenAI client. Once the page has rendered,
+warm_stacks() imports the stacks on a daemon thread; by the time a user opens the
+Governance or Social tab the import is a sys.modules lookup. If the user gets there
+first, the import simply happens (once) on the script thread instead.
+
+benchmarks/importtime.py keeps the pages' own import cost under a budget.
+"""
+
+import importlib
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+AGENT_STACKS: Dict[str, List[str]] = {
+    # pydantic_ai (and logfire.configure), supabase, googlesearch
+    'governance': ['VAMM_governanceagent.Expert_Agent', 'VAMM_governanceagent.create_agent'],
+    'social': ['VAMM_socialagent_master.create_agent'],
+    # Only needed for the CSV export
+    'tables': ['pandas'],
+}
+
+_import_seconds: Dict[str, float] = {}
+
+
+def import_stack(name: str):
+    """Import every module of a stack, recording how long the first import took"""
+    for module in AGENT_STACKS[name]:
+        started = time.perf_counter()
+        importlib.import_module(module)
+        _import_seconds.setdefault(module, time.perf_counter() - started)
+
+
+def import_times() -> Dict[str, float]:
+    """Seconds spent importing each stack module (as seen by the first importer)"""
+    return dict(_import_seconds)
+
+
+def warm_stacks(names: Optional[List[str]] = None, then: Optional[Callable[[], None]] = None) -> threading.Thread:
+    """Import the named stacks (all by default) on a daemon thread, then run an optional follow-up"""
+    def run():
+        for name in names or list(AGENT_STACKS):
+            try:
+                import_stack(name)
+            except Exception as e:
+                print(f"Error warming up {name} stack: {e}")
+        if then is not None:
+            try:
+                then()
+            except Exception as e:
+                print(f"Error after stack warm-up: {e}")
+
+    thread = threading.Thread(target=run, name='vamm-warmup', daemon=True)
+    thread.start()
+    return thread
@@ -1,17 +1,23 @@
 from __future__ import annotations as _annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from dotenv import load_dotenv
 import logfire
 import asyncio
+import heapq
 import httpx
 import os
 
 from pydantic_ai import Agent, ModelRetry, RunContext
 from pydantic_ai.models.openai import OpenAIModel
 from openai import AsyncOpenAI
-from supabase import Client
-from typing import List
+from typing import AsyncIterator, Dict, List, Optional
+
+from VAMM_governanceagent import db, embeddings
+from VAMM_governanceagent.db import SupabaseClient
+from VAMM_governanceagent.page_store import get_page_store
+from VAMM_governanceagent.sources import describe_sources, sources_for_state
+from VAMM_governanceagent.vector_index import RETRIEVAL_MODE, get_vector_index
 
 """
 CONFIGURATION GUIDE:
@@ -22,14 +28,21 @@ To adapt this agent for a different PDF:
    - PDF_PATH: Path to your PDF file
    - SOURCE_NAME: A unique identifier for your content source
    
-2. Update the filter in retrieve_relevant_documentation() to match your SOURCE_NAME:
-   - Change 'renewable_energy_siting_policies' to your chosen SOURCE_NAME in the filter parameter
+2. Register your SOURCE_NAME in sources.py (or the governance_sources.json file it reads),
+   with its scope and, for state or county documents, the states it covers
 
-3. Update the source filter in list_documentation_pages() and get_page_content():
-   - Change 'renewable_energy_siting_policies' to your SOURCE_NAME in the .eq() conditions
+3. Searches fan out over every source selected for the run - PydanticAIDeps.sources if given,
+   otherwise the sources that apply to PydanticAIDeps.state - and merge into one top 5
 
 4. Modify the system_prompt to be specific to your domain
 
+5. Optionally snapshot the source into a local vector index (see vector_index.py) and set
+   GOVERNANCE_RETRIEVAL=local to search it in-process instead of calling match_pdf_pages
+
+6. list_documentation_pages() and get_page_content() read from an in-process page store
+   (see page_store.py) that reloads when the source's rows or their content hashes change;
+   PAGE_STORE_REVALIDATE sets how often (in seconds) that is checked
+
 The crawler will populate your Supabase database with the content,
 and this agent will then be able to retrieve and search that content.
 """
@@ -43,8 +56,15 @@ logfire.configure(send_to_logfire='if-token-present')
 
 @dataclass
 class PydanticAIDeps:
-    supabase: Client
+    # Either client works: sync queries run on db's thread pool, async ones are awaited
+    supabase: SupabaseClient
     openai_client: AsyncOpenAI
+    # Explicit source names to search; when empty, sources are picked by the project's state
+    sources: List[str] = field(default_factory=list)
+    state: Optional[str] = None
+
+    def selected_sources(self) -> List[str]:
+        return list(self.sources) or sources_for_state(self.state)
 
 system_prompt = """
 You are an expert on renewable energy siting policies. You have access to comprehensive research and policy documents
@@ -67,17 +87,55 @@ pydantic_ai_expert = Agent(
     retries=2
 )
 
+async def stream_expert_response(prompt: str, deps: PydanticAIDeps) -> AsyncIterator[str]:
+    """Run the expert on a prompt and yield the answer text as it streams in"""
+    async with pydantic_ai_expert.run_stream(prompt, deps=deps) as result:
+        async for delta in result.stream_text(delta=True):
+            yield delta
+
+@pydantic_ai_expert.system_prompt
+def available_sources(ctx: RunContext[PydanticAIDeps]) -> str:
+    return f"Document sources available for this project:\n{describe_sources(ctx.deps.selected_sources())}"
+
 async def get_embedding(text: str, openai_client: AsyncOpenAI) -> List[float]:
-    """Get embedding vector from OpenAI."""
-    try:
-        response = await openai_client.embeddings.create(
-            model="text-embedding-3-small",
-            input=text
+    """Get embedding vector from OpenAI (cached on disk); raises EmbeddingError on failure."""
+    return await embeddings.get_embedding(text, openai_client)
+
+async def search_source(supabase: SupabaseClient, source: str, query_embedding: List[float],
+                        match_count: int) -> List[Dict]:
+    """Top chunks of one source, from its local snapshot when configured (and built), otherwise Supabase"""
+    local_index = get_vector_index(source) if RETRIEVAL_MODE == 'local' else None
+    if local_index is not None:
+        documents = await asyncio.to_thread(local_index.search, query_embedding, match_count)
+    else:
+        result = await db.execute(
+            supabase.rpc(
+                'match_pdf_pages',
+                {
+                    'query_embedding': query_embedding,
+                    'match_count': match_count,
+                    'filter': {'source': source}
+                }
+            )
         )
-        return response.data[0].embedding
-    except Exception as e:
-        print(f"Error getting embedding: {e}")
-        return [0] * 1536  # Return zero vector on error
+        documents = result.data or []
+    return [dict(doc, source=source) for doc in documents]
+
+async def search_sources(supabase: SupabaseClient, sources: List[str], query_embedding: List[float],
+                         match_count: int = 5) -> List[Dict]:
+    """Search every source concurrently and merge the per-source results into a global top match_count"""
+    results = await asyncio.gather(
+        *(search_source(supabase, source, query_embedding, match_count) for source in sources),
+        return_exceptions=True
+    )
+    documents = []
+    for source, result in zip(sources, results):
+        if isinstance(result, Exception):
+            # One failing shard shouldn't sink the whole search
+            print(f"Error searching {source}: {result}")
+            continue
+        documents.extend(result)
+    return heapq.nlargest(match_count, documents, key=lambda doc: doc.get('similarity') or 0)
 
 @pydantic_ai_expert.tool
 async def retrieve_relevant_documentation(ctx: RunContext[PydanticAIDeps], user_query: str) -> str:
@@ -95,27 +153,21 @@ async def retrieve_relevant_documentation(ctx: RunContext[PydanticAIDeps], user_
         # Get the embedding for the query
         query_embedding = await get_embedding(user_query, ctx.deps.openai_client)
         
-        # Query Supabase for relevant documents
-        result = ctx.deps.supabase.rpc(
-            'match_pdf_pages',
-            {
-                'query_embedding': query_embedding,
-                'match_count': 5,
-                'filter': {'source': 'renewable_energy_siting_policies'}
-            }
-        ).execute()
+        # Fan out over the selected sources and keep the best 5 overall
+        documents = await search_sources(ctx.deps.supabase, ctx.deps.selected_sources(), query_embedding, 5)
         
-        if not result.data:
+        if not documents:
             return "No relevant content found."
             
         # Format the results
         formatted_chunks = []
-        for doc in result.data:
+        for doc in documents:
             chunk_text = f"""
 # {doc['title']}
 
 {doc['content']}
 
+Source: {doc['source']}
 Page: {doc['page_num']}
 """
             formatted_chunks.append(chunk_text)
@@ -128,65 +180,52 @@ Page: {doc['page_num']}
         return f"Error retrieving content: {str(e)}"
 
 @pydantic_ai_expert.tool
-async def list_documentation_pages(ctx: RunContext[PydanticAIDeps]) -> List[int]:
+async def list_documentation_pages(ctx: RunContext[PydanticAIDeps], source: Optional[str] = None) -> Dict[str, List[int]]:
     """
-    Retrieve a list of all available pages in the PDF.
+    Retrieve a list of all available pages in each document source.
     
+    Args:
+        ctx: The context including the Supabase client
+        source: Only list pages of this source (defaults to every source available for the project)
+        
     Returns:
-        List[int]: List of unique page numbers
+        Dict[str, List[int]]: Unique page numbers per source
     """
-    try:
-        # Query Supabase for unique page numbers where source is renewable_energy_siting_policies
-        result = ctx.deps.supabase.from_('pdf_pages') \
-            .select('page_num') \
-            .eq('metadata->>source', 'renewable_energy_siting_policies') \
-            .execute()
-        
-        if not result.data:
-            return []
-            
-        # Extract unique page numbers
-        pages = sorted(set(doc['page_num'] for doc in result.data))
-        return pages
-        
-    except Exception as e:
-        print(f"Error retrieving pages: {e}")
-        return []
+    names = [source] if source else ctx.deps.selected_sources()
+    # Served from the in-process page stores (reloaded when a source changes)
+    results = await asyncio.gather(
+        *(get_page_store(name).list_pages(ctx.deps.supabase) for name in names),
+        return_exceptions=True
+    )
+    pages = {}
+    for name, result in zip(names, results):
+        if isinstance(result, Exception):
+            print(f"Error retrieving pages for {name}: {result}")
+            result = []
+        pages[name] = result
+    return pages
 
 @pydantic_ai_expert.tool
-async def get_page_content(ctx: RunContext[PydanticAIDeps], page_num: int) -> str:
+async def get_page_content(ctx: RunContext[PydanticAIDeps], page_num: int, source: Optional[str] = None) -> str:
     """
     Retrieve the full content of a specific page by combining all its chunks.
     
     Args:
         ctx: The context including the Supabase client
         page_num: The page number to retrieve
+        source: The document source the page belongs to (as listed by list_documentation_pages)
         
     Returns:
         str: The complete page content with all chunks combined in order
     """
     try:
-        # Query Supabase for all chunks of this page, ordered by chunk_number
-        result = ctx.deps.supabase.from_('pdf_pages') \
-            .select('title, content, chunk_number') \
-            .eq('page_num', page_num) \
-            .eq('metadata->>source', 'renewable_energy_siting_policies') \
-            .order('chunk_number') \
-            .execute()
-        
-        if not result.data:
-            return f"No content found for page: {page_num}"
-            
-        # Format the page with its title and all chunks
-        page_title = result.data[0]['title']
-        formatted_content = [f"# {page_title}\n"]
+        # Pages are pre-assembled from their chunks (in chunk_number order) by the page store
+        for name in ([source] if source else ctx.deps.selected_sources()):
+            page = await get_page_store(name).get_page(ctx.deps.supabase, page_num)
+            if page is not None:
+                return page
         
-        # Add each chunk's content
-        for chunk in result.data:
-            formatted_content.append(chunk['content'])
-            
-        # Join everything together
-        return "\n\n".join(formatted_content)
+        return f"No content found for page: {page_num}"
         
     except Exception as e:
         print(f"Error retrieving page content: {e}")
@@ -0,0 +1,375 @@
+"""
+Ingest a PDF into pdf_pages for the governance agent.
+
+    python -m VAMM_governanceagent.crawl_pdf path/to/document.pdf --source renewable_energy_siting_policies
+
+The pipeline streams batches of pages through three stages that run concurrently:
+page extraction + chunking -> batched embedding (bounded concurrency) -> bulk write.
+A checkpoint (data/ingest/<source>.json) records the last written page; after a
+crash the same command resumes from there. Pass --restart to ingest from page 1.
+
+Re-ingesting a revised PDF is incremental: every row stores metadata.content_hash,
+and chunks are diffed against the existing rows by (page_num, chunk_number). Only
+new or changed chunks are embedded and written, rows for chunks that no longer
+exist are deleted, and unchanged rows are left alone. Written rows are stamped with
+metadata.ingest_run (the run's UTC start time), which the page store reads as part
+of its cheap version check.
+"""
+
+from __future__ import annotations as _annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import pathlib
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import tiktoken
+from dotenv import load_dotenv
+from openai import AsyncOpenAI
+from pypdf import PdfReader
+from supabase import Client, create_client
+
+from VAMM_core.paths import DATA_DIR
+from VAMM_governanceagent.embeddings import EMBEDDING_MODEL, embed_texts, text_hash
+
+load_dotenv()
+
+PDF_PATH = os.getenv('PDF_PATH')
+SOURCE_NAME = os.getenv('SOURCE_NAME', 'renewable_energy_siting_policies')
+
+CHECKPOINT_DIR = DATA_DIR / 'ingest'
+
+CHUNK_SIZE = 5000
+PAGES_PER_BATCH = 16
+# Batches buffered between stages
+QUEUE_DEPTH = 2
+FETCH_PAGE_SIZE = 1000
+
+
+@dataclass
+class ProcessedChunk:
+    title: str
+    content: str
+    page_num: int
+    chunk_number: int
+    metadata: Dict
+    embedding: Optional[List[float]] = None
+    # Id of the existing row this chunk replaces (None for a new chunk)
+    row_id: Optional[int] = None
+    changed: bool = True
+
+    @property
+    def content_hash(self) -> str:
+        return self.metadata['content_hash']
+
+
+@dataclass
+class PageBatch:
+    pages: List[int]
+    chunks: List[ProcessedChunk] = field(default_factory=list)
+    tokens: int = 0
+    # Existing row ids whose chunks disappeared from these pages
+    deleted: List[int] = field(default_factory=list)
+
+    @property
+    def changed(self) -> List[ProcessedChunk]:
+        return [chunk for chunk in self.chunks if chunk.changed]
+
+
+@lru_cache(maxsize=None)
+def _encoding():
+    return tiktoken.encoding_for_model(EMBEDDING_MODEL)
+
+
+def count_tokens(text: str) -> int:
+    return len(_encoding().encode(text, disallowed_special=()))
+
+
+def file_sha256(path: pathlib.Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def extract_pages(reader: PdfReader, start_page: int = 1) -> Iterator[Tuple[int, str]]:
+    """Yield (page_num, text) for each page from start_page on (1-based, like pdf_pages.page_num)"""
+    for index in range(start_page - 1, len(reader.pages)):
+        yield index + 1, reader.pages[index].extract_text() or ''
+
+
+def chunk_text(text: str, chunk_size: int = CHUNK_SIZE) -> List[str]:
+    """Split text into chunks of at most chunk_size characters, preferring paragraph, then sentence breaks"""
+    text = text.strip()
+    chunks = []
+    while len(text) > chunk_size:
+        window = text[:chunk_size]
+        end = window.rfind('\n\n')
+        if end < chunk_size * 0.3:
+            # No usable paragraph break; fall back to the last sentence end
+            sentence_ends = [match.end() for match in re.finditer(r'[.!?]\s', window)]
+            end = sentence_ends[-1] if sentence_ends and sentence_ends[-1] > chunk_size * 0.3 else chunk_size
+        chunks.append(text[:end].strip())
+        text = text[end:].strip()
+    if text:
+        chunks.append(text)
+    return chunks
+
+
+def document_title(reader: PdfReader, pdf_path: pathlib.Path) -> str:
+    title = reader.metadata.title if reader.metadata else None
+    return (title or pdf_path.stem.replace('_', ' ')).strip()
+
+
+def chunk_page(title: str, page_num: int, text: str, source: str) -> List[ProcessedChunk]:
+    return [
+        ProcessedChunk(
+            title=f"{title} - Page {page_num}",
+            content=content,
+            page_num=page_num,
+            chunk_number=chunk_number,
+            metadata={
+                'source': source,
+                'chunk_size': len(content),
+                'content_hash': text_hash(f"{title} - Page {page_num}\n{content}"),
+            },
+        )
+        for chunk_number, content in enumerate(chunk_text(text))
+    ]
+
+
+class Checkpoint:
+    def __init__(self, source: str, directory: pathlib.Path = CHECKPOINT_DIR):
+        """
+        Progress of one source's ingestion, persisted after every written batch
+        """
+        self.path = directory / f"{source}.json"
+        self.state: Dict = {}
+
+    def load(self, file_hash: str) -> int:
+        """Next page to ingest; a checkpoint for a different file version is ignored"""
+        if self.path.exists():
+            self.state = json.loads(self.path.read_text())
+        if self.state.get('file_sha256') != file_hash:
+            self.state = {'file_sha256': file_hash, 'next_page': 1, 'pages': 0, 'chunks': 0, 'tokens': 0}
+        return self.state['next_page']
+
+    def advance(self, batch: PageBatch):
+        self.state['next_page'] = batch.pages[-1] + 1
+        self.state['pages'] += len(batch.pages)
+        self.state['chunks'] += len(batch.chunks)
+        self.state['tokens'] += batch.tokens
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so a crash never leaves a torn checkpoint
+        temp = self.path.with_suffix('.tmp')
+        temp.write_text(json.dumps(self.state))
+        temp.replace(self.path)
+
+    def reset(self):
+        self.path.unlink(missing_ok=True)
+
+
+def existing_chunks(supabase: Client, source: str) -> Dict[Tuple[int, int], List[Tuple[int, Optional[str]]]]:
+    """(page_num, chunk_number) -> [(row id, content_hash), ...] for the rows already stored for a source"""
+    existing = {}
+    start = 0
+    while True:
+        result = supabase.from_('pdf_pages') \
+            .select('id, page_num, chunk_number, content_hash:metadata->>content_hash') \
+            .eq('metadata->>source', source) \
+            .order('id') \
+            .range(start, start + FETCH_PAGE_SIZE - 1) \
+            .execute()
+        for row in result.data:
+            existing.setdefault((row['page_num'], row['chunk_number']), []).append((row['id'], row['content_hash']))
+        if len(result.data) < FETCH_PAGE_SIZE:
+            return existing
+        start += FETCH_PAGE_SIZE
+
+
+def diff_batch(batch: PageBatch, existing: Dict[Tuple[int, int], List[Tuple[int, Optional[str]]]]):
+    """Mark unchanged chunks, attach row ids to changed ones and collect rows that vanished"""
+    chunks = {(chunk.page_num, chunk.chunk_number): chunk for chunk in batch.chunks}
+    pages = set(batch.pages)
+    batch.deleted = []
+    for key, rows in existing.items():
+        if key[0] not in pages:
+            continue
+        if key not in chunks:
+            batch.deleted.extend(row_id for row_id, _ in rows)
+            continue
+        chunk = chunks[key]
+        (chunk.row_id, stored_hash), *duplicates = rows
+        chunk.changed = stored_hash != chunk.content_hash
+        # Rows duplicated by an earlier interrupted run
+        batch.deleted.extend(row_id for row_id, _ in duplicates)
+
+
+def _row(chunk: ProcessedChunk) -> Dict:
+    row = {
+        'title': chunk.title,
+        'content': chunk.content,
+        'page_num': chunk.page_num,
+        'chunk_number': chunk.chunk_number,
+        'metadata': chunk.metadata,
+        'embedding': chunk.embedding,
+    }
+    if chunk.row_id is not None:
+        row['id'] = chunk.row_id
+    return row
+
+
+def write_batch(supabase: Client, source: str, batch: PageBatch):
+    """Apply a diffed batch: delete vanished rows, update changed rows in place, insert new ones"""
+    if batch.deleted:
+        supabase.from_('pdf_pages').delete().in_('id', batch.deleted).execute()
+    updated = [_row(chunk) for chunk in batch.changed if chunk.row_id is not None]
+    if updated:
+        # Upsert on the primary key rewrites just these rows
+        supabase.from_('pdf_pages').upsert(updated).execute()
+    inserted = [_row(chunk) for chunk in batch.changed if chunk.row_id is None]
+    if inserted:
+        supabase.from_('pdf_pages').insert(inserted).execute()
+
+
+def delete_pages_after(supabase: Client, source: str, last_page: int):
+    """Drop rows for pages past the end of a document that got shorter"""
+    supabase.from_('pdf_pages') \
+        .delete() \
+        .eq('metadata->>source', source) \
+        .gt('page_num', last_page) \
+        .execute()
+
+
+class Throughput:
+    def __init__(self):
+        """
+        Running pages/sec and tokens/sec for an ingestion run
+        """
+        self.started = time.perf_counter()
+        self.pages = 0
+        self.chunks = 0
+        self.tokens = 0
+        self.embedded = 0
+        self.deleted = 0
+
+    def add(self, batch: PageBatch):
+        self.pages += len(batch.pages)
+        self.chunks += len(batch.chunks)
+        self.tokens += batch.tokens
+        self.embedded += len(batch.changed)
+        self.deleted += len(batch.deleted)
+
+    def summary(self) -> Dict:
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        return {
+            'pages': self.pages,
+            'chunks': self.chunks,
+            'tokens': self.tokens,
+            'embedded_chunks': self.embedded,
+            'unchanged_chunks': self.chunks - self.embedded,
+            'deleted_chunks': self.deleted,
+            'seconds': round(elapsed, 1),
+            'pages_per_sec': round(self.pages / elapsed, 2),
+            'tokens_per_sec': round(self.tokens / elapsed, 1),
+        }
+
+
+async def ingest_pdf(pdf_path: pathlib.Path,
+                     source: str,
+                     supabase: Client,
+                     openai_client: AsyncOpenAI,
+                     pages_per_batch: int = PAGES_PER_BATCH,
+                     restart: bool = False) -> Dict:
+    """Run the extraction -> embedding -> write pipeline for one PDF, resuming from its checkpoint"""
+    checkpoint = Checkpoint(source)
+    if restart:
+        checkpoint.reset()
+    start_page = checkpoint.load(file_sha256(pdf_path))
+
+    # Stamped on every row this run writes, so readers can tell that a source changed
+    ingest_run = datetime.now(timezone.utc).isoformat()
+    reader = PdfReader(pdf_path)
+    title = document_title(reader, pdf_path)
+    total_pages = len(reader.pages)
+    if start_page > 1:
+        print(f"Resuming {pdf_path.name} at page {start_page} of {total_pages}")
+    existing = await asyncio.to_thread(existing_chunks, supabase, source)
+
+    to_embed: asyncio.Queue = asyncio.Queue(QUEUE_DEPTH)
+    to_write: asyncio.Queue = asyncio.Queue(QUEUE_DEPTH)
+    throughput = Throughput()
+
+    def extract_batch(pages: Iterator[Tuple[int, str]]) -> Optional[PageBatch]:
+        batch = PageBatch(pages=[])
+        for page_num, text in pages:
+            batch.pages.append(page_num)
+            batch.chunks.extend(chunk_page(title, page_num, text, source))
+            if len(batch.pages) == pages_per_batch:
+                break
+        diff_batch(batch, existing)
+        for chunk in batch.changed:
+            chunk.metadata['ingest_run'] = ingest_run
+        # Tokens actually sent for embedding
+        batch.tokens = sum(count_tokens(chunk.content) for chunk in batch.changed)
+        return batch if batch.pages else None
+
+    async def extractor():
+        pages = extract_pages(reader, start_page)
+        while True:
+            # pypdf parsing is CPU-bound; keep it off the event loop
+            batch = await asyncio.to_thread(extract_batch, pages)
+            await to_embed.put(batch)
+            if batch is None:
+                return
+
+    async def embedder():
+        while (batch := await to_embed.get()) is not None:
+            changed = batch.changed
+            if changed:
+                vectors = await embed_texts([chunk.content for chunk in changed], openai_client)
+                for chunk, vector in zip(changed, vectors):
+                    chunk.embedding = vector.tolist()
+            await to_write.put(batch)
+        await to_write.put(None)
+
+    async def writer():
+        # Batches arrive in page order, so the checkpoint only ever moves forward
+        while (batch := await to_write.get()) is not None:
+            await asyncio.to_thread(write_batch, supabase, source, batch)
+            checkpoint.advance(batch)
+            throughput.add(batch)
+            stats = throughput.summary()
+            print(f"Pages {batch.pages[0]}-{batch.pages[-1]} of {total_pages}: "
+                  f"{len(batch.changed)}/{len(batch.chunks)} chunks changed, {len(batch.deleted)} deleted, "
+                  f"{stats['pages_per_sec']} pages/s, {stats['tokens_per_sec']} tokens/s")
+
+    await asyncio.gather(extractor(), embedder(), writer())
+    await asyncio.to_thread(delete_pages_after, supabase, source, total_pages)
+    return throughput.summary()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest a PDF into pdf_pages")
+    parser.add_argument('pdf', nargs='?', default=PDF_PATH, help="PDF to ingest (defaults to $PDF_PATH)")
+    parser.add_argument('--source', default=SOURCE_NAME, help="metadata.source for the rows")
+    parser.add_argument('--pages-per-batch', type=int, default=PAGES_PER_BATCH)
+    parser.add_argument('--restart', action='store_true', help="Ignore the checkpoint and start from page 1")
+    args = parser.parse_args()
+    if not args.pdf:
+        parser.error("Pass a PDF path or set PDF_PATH")
+
+    supabase = create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_KEY'))
+    openai_client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    summary = asyncio.run(ingest_pdf(pathlib.Path(args.pdf), args.source, supabase, openai_client,
+                                     pages_per_batch=args.pages_per_batch, restart=args.restart))
+    print(json.dumps(summary))
@@ -4,12 +4,12 @@ from typing import Dict, Optional
 from googlesearch import search
 
 class GovernanceAgent:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, client: Optional[openai.Client] = None):
         """
-        Initialize the Governance Agent with necessary API key
+        Initialize the Governance Agent with necessary API key (or a shared OpenAI client)
         """
         self.openai_api_key = api_key
-        self.client = openai.Client(api_key=self.openai_api_key)
+        self.client = client or openai.Client(api_key=self.openai_api_key)
         
     def get_building_department_info(self, location: str) -> Dict:
         """
@@ -0,0 +1,37 @@
+"""
+Non-blocking Supabase access for the agent tools.
+
+Tools await execute(query) for every PostgREST call. Queries built on an
+AsyncClient are awaited directly; queries built on the synchronous Client run on
+a dedicated thread pool, so a database round trip never blocks the event loop and
+tool calls the model makes in parallel really do overlap.
+"""
+
+from __future__ import annotations as _annotations
+
+import asyncio
+import inspect
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Union
+
+from supabase import AsyncClient, Client
+
+SupabaseClient = Union[Client, AsyncClient]
+
+# Enough workers for every tool call of a turn plus the per-source fan-out
+MAX_WORKERS = int(os.getenv('SUPABASE_MAX_WORKERS', '16'))
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='supabase')
+
+
+async def run_blocking(func: Callable, *args) -> Any:
+    """Run a blocking call on the Supabase thread pool"""
+    return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+
+
+async def execute(query) -> Any:
+    """Execute a PostgREST query built on either client without blocking the event loop"""
+    if inspect.iscoroutinefunction(query.execute):
+        return await query.execute()
+    return await run_blocking(query.execute)
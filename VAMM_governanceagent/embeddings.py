@@ -0,0 +1,156 @@
+"""
+Embedding client with a persistent content-hash cache.
+
+Vectors are cached in SQLite as float32 blobs keyed by (model, sha256 of the
+normalized text), so repeated queries and re-ingested chunks never hit the API twice.
+Misses are embedded in batches with bounded concurrency.
+"""
+
+from __future__ import annotations as _annotations
+
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from openai import AsyncOpenAI
+
+from VAMM_core.paths import DATA_DIR
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIM = 1536
+EMBEDDING_CACHE_DB = DATA_DIR / 'cache' / 'embeddings.sqlite'
+
+BATCH_SIZE = 128
+MAX_CONCURRENCY = 4
+
+
+class EmbeddingError(Exception):
+    """Raised when embeddings cannot be produced; callers must not fall back to zero vectors"""
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used for hashing: NFC, whitespace collapsed"""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, path=EMBEDDING_CACHE_DB):
+        """
+        Open (and create, if needed) the SQLite embedding cache
+        """
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+            """
+        )
+
+    def get_many(self, model: str, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(unique), 500):
+                chunk = unique[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *chunk]
+                ).fetchall()
+                for digest, blob in rows:
+                    found[digest] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, model: str, vectors: Dict[str, np.ndarray]):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                [(model, digest, np.asarray(vector, dtype=np.float32).tobytes()) for digest, vector in vectors.items()]
+            )
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Process-wide embedding cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache()
+    return _cache
+
+
+async def embed_texts(texts: Sequence[str],
+                      openai_client: AsyncOpenAI,
+                      model: str = EMBEDDING_MODEL,
+                      batch_size: int = BATCH_SIZE,
+                      max_concurrency: int = MAX_CONCURRENCY,
+                      cache: Optional[EmbeddingCache] = None) -> np.ndarray:
+    """
+    Embed many texts, returning an (n, dim) float32 matrix in input order.
+
+    Cached vectors are reused; the remaining unique texts are sent in batches of
+    batch_size with at most max_concurrency requests in flight.
+    """
+    if cache is None:
+        cache = get_embedding_cache()
+
+    normalized = [normalize_text(text) for text in texts]
+    if any(not text for text in normalized):
+        raise EmbeddingError("Cannot embed empty text")
+    hashes = [hashlib.sha256(text.encode('utf-8')).hexdigest() for text in normalized]
+
+    vectors = cache.get_many(model, hashes)
+    missing = {}
+    for digest, text in zip(hashes, normalized):
+        if digest not in vectors:
+            missing[digest] = text
+
+    if missing:
+        items = list(missing.items())
+        batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def embed_batch(batch):
+            async with semaphore:
+                try:
+                    response = await openai_client.embeddings.create(
+                        model=model,
+                        input=[text for _, text in batch]
+                    )
+                except Exception as e:
+                    raise EmbeddingError(f"Embedding request failed: {e}") from e
+            # Results come back with their input index
+            return {batch[item.index][0]: np.asarray(item.embedding, dtype=np.float32) for item in response.data}
+
+        fetched = {}
+        for result in await asyncio.gather(*(embed_batch(batch) for batch in batches)):
+            fetched.update(result)
+        cache.put_many(model, fetched)
+        vectors.update(fetched)
+
+    return np.stack([vectors[digest] for digest in hashes])
+
+
+async def get_embedding(text: str, openai_client: AsyncOpenAI, model: str = EMBEDDING_MODEL) -> List[float]:
+    """Embedding for a single text (cached); raises EmbeddingError on failure"""
+    return (await embed_texts([text], openai_client, model=model))[0].tolist()
@@ -0,0 +1,154 @@
+"""
+In-process page store for the list_documentation_pages / get_page_content tools.
+
+Each source is loaded once: the sorted page manifest and every page's text,
+assembled from its chunks in chunk_number order. Concurrent tool calls share a
+single load. The store keeps a version token for the source (row count, highest
+id and the latest metadata.ingest_run, which crawl_pdf stamps on every row it
+writes, so rows updated in place by incremental re-ingestion count too) and
+re-checks it at most every PAGE_STORE_REVALIDATE seconds. That check is two
+single-row queries however large the source is; the pages are reloaded only when
+the token changed, so re-ingesting a PDF is picked up without restarting the app.
+"""
+
+from __future__ import annotations as _annotations
+
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from VAMM_governanceagent import db
+from VAMM_governanceagent.db import SupabaseClient
+
+REVALIDATE_SECONDS = float(os.getenv('PAGE_STORE_REVALIDATE', '300'))
+FETCH_PAGE_SIZE = 1000
+
+
+async def source_version(supabase: SupabaseClient, source: str) -> Tuple[Optional[int], Optional[int], Optional[str]]:
+    """Version token for a source: (row count, highest id, latest ingest run), from two single-row queries"""
+    latest_row, latest_run = await asyncio.gather(
+        db.execute(
+            supabase.from_('pdf_pages')
+            .select('id', count='exact')
+            .eq('metadata->>source', source)
+            .order('id', desc=True)
+            .limit(1)
+        ),
+        db.execute(
+            supabase.from_('pdf_pages')
+            .select('ingest_run:metadata->>ingest_run')
+            .eq('metadata->>source', source)
+            .not_.is_('metadata->>ingest_run', 'null')
+            .order('metadata->>ingest_run', desc=True)
+            .limit(1)
+        ),
+    )
+    return (
+        latest_row.count,
+        latest_row.data[0]['id'] if latest_row.data else None,
+        latest_run.data[0]['ingest_run'] if latest_run.data else None,
+    )
+
+
+async def _fetch_chunks(supabase: SupabaseClient, source: str) -> List[Dict]:
+    chunks = []
+    start = 0
+    while True:
+        result = await db.execute(
+            supabase.from_('pdf_pages')
+            .select('title, content, page_num, chunk_number')
+            .eq('metadata->>source', source)
+            .order('page_num')
+            .order('chunk_number')
+            .range(start, start + FETCH_PAGE_SIZE - 1)
+        )
+        chunks.extend(result.data)
+        if len(result.data) < FETCH_PAGE_SIZE:
+            return chunks
+        start += FETCH_PAGE_SIZE
+
+
+def assemble_pages(chunks: List[Dict]) -> Dict[int, str]:
+    """Page texts formatted as get_page_content returns them: title heading, then chunks in order"""
+    grouped: Dict[int, List[Dict]] = {}
+    for chunk in chunks:
+        grouped.setdefault(chunk['page_num'], []).append(chunk)
+
+    pages = {}
+    for page_num, page_chunks in grouped.items():
+        page_chunks.sort(key=lambda chunk: chunk['chunk_number'])
+        formatted_content = [f"# {page_chunks[0]['title']}\n"]
+        formatted_content.extend(chunk['content'] for chunk in page_chunks)
+        pages[page_num] = "\n\n".join(formatted_content)
+    return pages
+
+
+class PageStore:
+    def __init__(self, source: str):
+        """
+        Manifest and assembled page texts for one pdf_pages source
+        """
+        self.source = source
+        self.version: Optional[Tuple[Optional[int], Optional[int], Optional[str]]] = None
+        self.pages: Dict[int, str] = {}
+        self.manifest: List[int] = []
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing: Optional[asyncio.Task] = None
+
+    async def refresh(self, supabase: SupabaseClient, force: bool = False):
+        """Reload if the source version changed (checked at most every REVALIDATE_SECONDS)"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if not force and self.version is not None and time.monotonic() - self.checked_at < REVALIDATE_SECONDS:
+                return
+            task = self._refreshing
+            if task is not None and not task.done() and task.get_loop() is loop:
+                if self.version is not None and not force:
+                    # Concurrent callers keep serving the current pages while one caller revalidates
+                    return
+            else:
+                # Single flight: callers arriving during the first load wait for it instead of loading again
+                task = self._refreshing = loop.create_task(self._reload(supabase, force))
+        # A cancelled caller must not cancel the load the others are waiting for
+        await asyncio.shield(task)
+
+    async def _reload(self, supabase: SupabaseClient, force: bool):
+        version = await source_version(supabase, self.source)
+        if force or version != self.version:
+            pages = assemble_pages(await _fetch_chunks(supabase, self.source))
+            with self._lock:
+                self.pages = pages
+                self.manifest = sorted(pages)
+                self.version = version
+        self.checked_at = time.monotonic()
+
+    async def list_pages(self, supabase: SupabaseClient) -> List[int]:
+        await self.refresh(supabase)
+        return self.manifest
+
+    async def get_page(self, supabase: SupabaseClient, page_num: int) -> Optional[str]:
+        await self.refresh(supabase)
+        return self.pages.get(page_num)
+
+
+_stores: Dict[str, PageStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_page_store(source: str) -> PageStore:
+    """Process-wide page store for a source"""
+    with _stores_lock:
+        if source not in _stores:
+            _stores[source] = PageStore(source)
+        return _stores[source]
+
+
+async def preload_page_store(supabase: SupabaseClient, source: str):
+    """Load a source's pages ahead of the first tool call"""
+    try:
+        await get_page_store(source).refresh(supabase)
+    except Exception as e:
+        print(f"Error preloading pages for {source}: {e}")
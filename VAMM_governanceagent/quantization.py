@@ -0,0 +1,241 @@
+"""
+Compact coarse representations of the governance embeddings.
+
+A coarse index holds Matryoshka-truncated vectors (the leading dims of a
+text-embedding-3 vector, renormalized) encoded as int8 or product-quantized codes.
+It only produces a shortlist; the caller reranks that shortlist against the
+full-precision matrix, which can stay memory-mapped on disk.
+"""
+
+from __future__ import annotations as _annotations
+
+import json
+import pathlib
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+COARSE_CONFIG_FILE = 'coarse.json'
+COARSE_CODES_FILE = 'coarse_codes.npy'
+COARSE_PARAMS_FILE = 'coarse_params.npz'
+
+# Rows scored per block so int8 -> float32 upcasts never materialize the whole matrix
+BLOCK_ROWS = 65536
+
+
+def truncate(matrix: np.ndarray, dims: Optional[int]) -> np.ndarray:
+    """Keep the leading dims of each vector and renormalize (Matryoshka truncation)"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if dims and dims < matrix.shape[-1]:
+        matrix = matrix[..., :dims]
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1
+    return (matrix / norms).astype(np.float32)
+
+
+class Int8Codec:
+    kind = 'int8'
+
+    def __init__(self, scale: Optional[np.ndarray] = None):
+        """
+        Symmetric per-dimension int8 scalar quantization
+        """
+        self.scale = scale
+
+    def fit(self, matrix: np.ndarray) -> 'Int8Codec':
+        scale = np.abs(matrix).max(axis=0) / 127
+        scale[scale == 0] = 1
+        self.scale = scale.astype(np.float32)
+        return self
+
+    def encode(self, matrix: np.ndarray) -> np.ndarray:
+        return np.clip(np.rint(matrix / self.scale), -127, 127).astype(np.int8)
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        # (codes * scale) @ q == codes @ (scale * q)
+        scaled_query = (self.scale * query).astype(np.float32)
+        out = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), BLOCK_ROWS):
+            out[start:start + BLOCK_ROWS] = codes[start:start + BLOCK_ROWS].astype(np.float32) @ scaled_query
+        return out
+
+    def params(self) -> Dict[str, np.ndarray]:
+        return {'scale': self.scale}
+
+    @classmethod
+    def from_params(cls, params, config: Dict) -> 'Int8Codec':
+        return cls(params['scale'])
+
+
+class PQCodec:
+    kind = 'pq'
+
+    def __init__(self, subspaces: int = 32, codebooks: Optional[np.ndarray] = None):
+        """
+        Product quantization: subspaces x 256 centroids, one uint8 code per subspace
+        """
+        self.subspaces = subspaces
+        self.codebooks = codebooks
+
+    def _split(self, matrix: np.ndarray) -> List[np.ndarray]:
+        return np.split(matrix, self.subspaces, axis=-1)
+
+    def fit(self, matrix: np.ndarray, iterations: int = 15, seed: int = 0) -> 'PQCodec':
+        if matrix.shape[1] % self.subspaces:
+            raise ValueError(f"{matrix.shape[1]} dims are not divisible into {self.subspaces} subspaces")
+        rng = np.random.default_rng(seed)
+        centroids = min(256, len(matrix))
+        codebooks = []
+        for sub in self._split(matrix):
+            book = sub[rng.choice(len(sub), size=centroids, replace=False)].copy()
+            for _ in range(iterations):
+                assignment = self._nearest(sub, book)
+                for c in range(centroids):
+                    members = sub[assignment == c]
+                    if len(members):
+                        book[c] = members.mean(axis=0)
+            if centroids < 256:
+                book = np.vstack([book, np.zeros((256 - centroids, book.shape[1]), dtype=np.float32)])
+            codebooks.append(book)
+        self.codebooks = np.stack(codebooks).astype(np.float32)
+        return self
+
+    @staticmethod
+    def _nearest(sub: np.ndarray, book: np.ndarray) -> np.ndarray:
+        # argmin ||x - c||^2 == argmax (x.c - ||c||^2 / 2)
+        return np.argmax(sub @ book.T - 0.5 * (book ** 2).sum(axis=1), axis=1)
+
+    def encode(self, matrix: np.ndarray) -> np.ndarray:
+        return np.stack(
+            [self._nearest(sub, book) for sub, book in zip(self._split(matrix), self.codebooks)], axis=1
+        ).astype(np.uint8)
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        # Asymmetric distance: per-subspace lookup tables of centroid . query
+        tables = np.einsum('mkd,md->mk', self.codebooks, np.stack(self._split(query)))
+        out = np.zeros(len(codes), dtype=np.float32)
+        for m in range(self.subspaces):
+            out += tables[m][codes[:, m]]
+        return out
+
+    def params(self) -> Dict[str, np.ndarray]:
+        return {'codebooks': self.codebooks}
+
+    @classmethod
+    def from_params(cls, params, config: Dict) -> 'PQCodec':
+        return cls(config['subspaces'], params['codebooks'])
+
+
+CODECS = {codec.kind: codec for codec in (Int8Codec, PQCodec)}
+
+
+class CoarseIndex:
+    def __init__(self, codec, codes: np.ndarray, dims: Optional[int]):
+        """
+        Quantized (optionally truncated) copy of an embedding matrix used to shortlist rows
+        """
+        self.codec = codec
+        self.codes = codes
+        self.dims = dims
+
+    @classmethod
+    def build(cls, matrix: np.ndarray, kind: str = 'int8', dims: Optional[int] = None,
+              subspaces: int = 32) -> 'CoarseIndex':
+        reduced = truncate(matrix, dims)
+        codec = PQCodec(subspaces) if kind == 'pq' else CODECS[kind]()
+        codec.fit(reduced)
+        return cls(codec, codec.encode(reduced), dims)
+
+    def shortlist(self, query: np.ndarray, size: int, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Row ids of the size best coarse matches (restricted to rows when given)"""
+        reduced = truncate(query, self.dims)
+        codes = self.codes if rows is None else self.codes[rows]
+        scores = self.codec.scores(codes, reduced)
+        size = min(size, len(scores))
+        # Every probed IVF list can be empty
+        if size == 0:
+            return np.empty(0, dtype=np.int64) if rows is None else rows[:0]
+        top = np.argpartition(-scores, size - 1)[:size]
+        return top if rows is None else rows[top]
+
+    def bytes_per_vector(self) -> int:
+        return int(self.codes.shape[1] * self.codes.itemsize)
+
+    def save(self, directory: pathlib.Path):
+        config = {'kind': self.codec.kind, 'dims': self.dims}
+        if isinstance(self.codec, PQCodec):
+            config['subspaces'] = self.codec.subspaces
+        (directory / COARSE_CONFIG_FILE).write_text(json.dumps(config))
+        np.save(directory / COARSE_CODES_FILE, self.codes)
+        np.savez(directory / COARSE_PARAMS_FILE, **self.codec.params())
+
+    @classmethod
+    def load(cls, directory: pathlib.Path) -> Optional['CoarseIndex']:
+        if not (directory / COARSE_CONFIG_FILE).exists():
+            return None
+        config = json.loads((directory / COARSE_CONFIG_FILE).read_text())
+        with np.load(directory / COARSE_PARAMS_FILE) as params:
+            codec = CODECS[config['kind']].from_params(params, config)
+        return cls(codec, np.load(directory / COARSE_CODES_FILE), config['dims'])
+
+    @staticmethod
+    def remove(directory: pathlib.Path):
+        for name in (COARSE_CONFIG_FILE, COARSE_CODES_FILE, COARSE_PARAMS_FILE):
+            (directory / name).unlink(missing_ok=True)
+
+
+def recall_report(matrix: np.ndarray,
+                  queries: np.ndarray,
+                  configs: Sequence[Dict],
+                  k: int = 5,
+                  rerank_factor: int = 4) -> List[Dict]:
+    """
+    Recall@k and latency of two-stage search for each coarse config, against exact float32 search.
+
+    Each config is {'kind': 'int8' | 'pq' | 'float32', 'dims': int or None, 'subspaces': int}.
+    """
+    matrix = truncate(matrix, None)
+    queries = truncate(queries, None)
+    truth = [set(np.argsort(-(matrix @ q))[:k]) for q in queries]
+    full_bytes = matrix.shape[1] * 4
+    size = min(k * rerank_factor, len(matrix))
+    if size == 0:
+        # No vectors (or k == 0): nothing to shortlist or measure
+        return []
+
+    report = []
+    for config in configs:
+        kind, dims = config.get('kind', 'int8'), config.get('dims')
+        if kind == 'float32':
+            reduced = truncate(matrix, dims)
+
+            def search(q):
+                scores = reduced @ truncate(q, dims)
+                return np.argpartition(-scores, size - 1)[:size]
+            resident = reduced.shape[1] * 4
+        else:
+            coarse = CoarseIndex.build(matrix, kind=kind, dims=dims, subspaces=config.get('subspaces', 32))
+
+            def search(q):
+                return coarse.shortlist(q, size)
+            resident = coarse.bytes_per_vector()
+
+        hits, elapsed = 0, 0.0
+        for q, expected in zip(queries, truth):
+            started = time.perf_counter()
+            shortlist = search(q)
+            # Full-precision rerank of the shortlist
+            reranked = shortlist[np.argsort(-(matrix[shortlist] @ q))[:k]]
+            elapsed += time.perf_counter() - started
+            hits += len(expected & set(reranked.tolist()))
+
+        report.append({
+            'kind': kind,
+            'dims': dims or matrix.shape[1],
+            'bytes_per_vector': resident,
+            'compression': round(full_bytes / resident, 1),
+            f'recall@{k}': round(hits / (k * len(queries)), 4),
+            'latency_ms': round(1000 * elapsed / len(queries), 3),
+        })
+    return report
@@ -0,0 +1,81 @@
+"""
+Registry of the document sources (index shards) the governance agent can search.
+
+Each source is one metadata.source value in pdf_pages (and, optionally, one local
+vector index snapshot). Sources are scoped: national and federal sources apply to
+every project, state and county sources only to projects in their states.
+
+Extra sources are registered in a JSON file (GOVERNANCE_SOURCES, default
+data/governance_sources.json), a list of objects such as:
+
+    [{"name": "tx_county_solar_ordinances", "title": "Texas county solar ordinances",
+      "scope": "county", "states": ["TX"]}]
+"""
+
+from __future__ import annotations as _annotations
+
+import json
+import os
+import pathlib
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from VAMM_core.paths import DATA_DIR
+
+SOURCES_FILE = pathlib.Path(os.getenv('GOVERNANCE_SOURCES', str(DATA_DIR / 'governance_sources.json')))
+
+SCOPES = ('national', 'federal', 'state', 'county')
+
+
+@dataclass(frozen=True)
+class DocumentSource:
+    name: str
+    title: str
+    scope: str = 'national'
+    states: Tuple[str, ...] = ()
+
+    def applies_to(self, state: Optional[str]) -> bool:
+        if not self.states:
+            return True
+        return state is not None and state.upper() in self.states
+
+
+DEFAULT_SOURCES = [
+    DocumentSource(
+        'renewable_energy_siting_policies',
+        'Renewable energy siting policies',
+        scope='national',
+    ),
+]
+
+
+@lru_cache(maxsize=None)
+def load_sources() -> Dict[str, DocumentSource]:
+    """All registered sources by name: the built-in defaults plus SOURCES_FILE entries"""
+    sources = {source.name: source for source in DEFAULT_SOURCES}
+    if SOURCES_FILE.exists():
+        for entry in json.loads(SOURCES_FILE.read_text()):
+            scope = entry.get('scope', 'national')
+            if scope not in SCOPES:
+                raise ValueError(f"Unknown scope '{scope}' for source {entry['name']}")
+            sources[entry['name']] = DocumentSource(
+                entry['name'],
+                entry.get('title', entry['name']),
+                scope=scope,
+                states=tuple(state.upper() for state in entry.get('states', ())),
+            )
+    return sources
+
+
+def sources_for_state(state: Optional[str]) -> List[str]:
+    """Names of the sources relevant to a project in state (two-letter code, or None for national only)"""
+    return [source.name for source in load_sources().values() if source.applies_to(state)]
+
+
+def describe_sources(names: List[str]) -> str:
+    sources = load_sources()
+    return "\n".join(
+        f"- {name}: {sources[name].title} ({sources[name].scope})" if name in sources else f"- {name}"
+        for name in names
+    )
@@ -0,0 +1,274 @@
+"""
+In-process vector index over pdf_pages, as an alternative to the match_pdf_pages RPC.
+
+Snapshot a source once (and again whenever it is re-ingested):
+
+    python -m VAMM_governanceagent.vector_index --source renewable_energy_siting_policies
+
+The snapshot is a unit-normalized float32 embedding matrix saved as .npy and memory-mapped
+at load, plus the chunk metadata. Exact top-k is one matrix-vector product; building with
+--ivf-lists N adds an inverted-file layout (k-means lists) for corpora too large to scan.
+
+Building with --quantization int8|pq (optionally --coarse-dims 256) adds a compact coarse
+index: search shortlists on the quantized codes, then reranks the shortlist against the
+float32 matrix, which then only needs to be paged in for the shortlisted rows.
+--report prints recall@k and latency for a range of coarse configurations.
+
+Set GOVERNANCE_RETRIEVAL=local to make the agent search the snapshot instead of Supabase.
+"""
+
+from __future__ import annotations as _annotations
+
+import argparse
+import json
+import os
+import pathlib
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from VAMM_core.paths import DATA_DIR
+from VAMM_governanceagent.quantization import CoarseIndex, recall_report
+
+RETRIEVAL_MODE = os.getenv('GOVERNANCE_RETRIEVAL', 'remote')
+INDEX_DIR = pathlib.Path(os.getenv('GOVERNANCE_INDEX_DIR', str(DATA_DIR / 'governance_index')))
+
+EMBEDDINGS_FILE = 'embeddings.npy'
+CHUNKS_FILE = 'chunks.json'
+MANIFEST_FILE = 'manifest.json'
+CENTROIDS_FILE = 'centroids.npy'
+OFFSETS_FILE = 'list_offsets.npy'
+
+DEFAULT_NPROBE = 8
+# Coarse shortlist size, as a multiple of match_count, reranked at full precision
+RERANK_FACTOR = 4
+FETCH_PAGE_SIZE = 1000
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return (matrix / norms).astype(np.float32)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, len(scores))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def kmeans(matrix: np.ndarray, n_lists: int, iterations: int = 20, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on unit vectors; returns (n_lists, dim) unit centroids, at most one per vector"""
+    rng = np.random.default_rng(seed)
+    n_lists = min(n_lists, len(matrix))
+    centroids = matrix[rng.choice(len(matrix), size=n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(matrix @ centroids.T, axis=1)
+        for list_id in range(n_lists):
+            members = matrix[assignment == list_id]
+            if len(members):
+                centroids[list_id] = members.sum(axis=0)
+            else:
+                # Re-seed empty lists with a random vector
+                centroids[list_id] = matrix[rng.integers(len(matrix))]
+        centroids = _normalize_rows(centroids)
+    return centroids
+
+
+class LocalVectorIndex:
+    def __init__(self, embeddings: np.ndarray, chunks: List[Dict], manifest: Dict,
+                 centroids: Optional[np.ndarray] = None, list_offsets: Optional[np.ndarray] = None,
+                 coarse: Optional[CoarseIndex] = None):
+        """
+        Search over a (usually memory-mapped) unit-normalized embedding matrix and its chunk rows
+        """
+        self.embeddings = embeddings
+        self.chunks = chunks
+        self.manifest = manifest
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.coarse = coarse
+
+    @classmethod
+    def load(cls, directory: pathlib.Path) -> Optional['LocalVectorIndex']:
+        if not (directory / MANIFEST_FILE).exists():
+            return None
+        manifest = json.loads((directory / MANIFEST_FILE).read_text())
+        chunks = json.loads((directory / CHUNKS_FILE).read_text())
+        embeddings = np.load(directory / EMBEDDINGS_FILE, mmap_mode='r')
+        centroids = list_offsets = None
+        if (directory / CENTROIDS_FILE).exists():
+            centroids = np.load(directory / CENTROIDS_FILE)
+            list_offsets = np.load(directory / OFFSETS_FILE)
+        return cls(embeddings, chunks, manifest, centroids, list_offsets, CoarseIndex.load(directory))
+
+    def _candidates(self, query: np.ndarray, nprobe: int) -> Optional[np.ndarray]:
+        """Row ids in the nprobe closest IVF lists, or None for an exact scan"""
+        if self.centroids is None:
+            return None
+        lists = _top_k(self.centroids @ query, nprobe)
+        return np.concatenate([
+            np.arange(self.list_offsets[list_id], self.list_offsets[list_id + 1]) for list_id in lists
+        ])
+
+    def search(self, query_embedding, match_count: int = 5, nprobe: int = DEFAULT_NPROBE,
+               rerank_factor: int = RERANK_FACTOR) -> List[Dict]:
+        """Top match_count chunks by cosine similarity, shaped like match_pdf_pages rows"""
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1)
+
+        candidates = self._candidates(query, nprobe)
+        if self.coarse is not None:
+            # Two-stage: quantized shortlist, then exact rerank of just those rows
+            candidates = np.sort(self.coarse.shortlist(query, match_count * rerank_factor, candidates))
+
+        if candidates is None:
+            scores = self.embeddings @ query
+            top = _top_k(scores, match_count)
+            rows, similarities = top, scores[top]
+        else:
+            scores = self.embeddings[candidates] @ query
+            top = _top_k(scores, match_count)
+            rows, similarities = candidates[top], scores[top]
+
+        return [dict(self.chunks[row], similarity=float(similarity)) for row, similarity in zip(rows, similarities)]
+
+
+def build_index(rows: List[Dict], directory: pathlib.Path, source: str, ivf_lists: int = 0,
+                quantization: Optional[str] = None, coarse_dims: Optional[int] = None,
+                pq_subspaces: int = 32) -> int:
+    """Write a snapshot from pdf_pages rows (each with an 'embedding')"""
+    if not rows:
+        raise ValueError(f"No embedded pdf_pages rows for source {source!r}; nothing to index")
+    matrix = _normalize_rows(np.array([row['embedding'] for row in rows], dtype=np.float32))
+    chunks = [
+        {key: row.get(key) for key in ('id', 'title', 'content', 'page_num', 'chunk_number', 'metadata')}
+        for row in rows
+    ]
+
+    directory.mkdir(parents=True, exist_ok=True)
+    for stale in (CENTROIDS_FILE, OFFSETS_FILE):
+        (directory / stale).unlink(missing_ok=True)
+
+    if ivf_lists:
+        if ivf_lists > len(rows):
+            print(f"Only {len(rows)} rows; building {len(rows)} IVF lists instead of {ivf_lists}")
+            ivf_lists = len(rows)
+        centroids = kmeans(matrix, ivf_lists)
+        assignment = np.argmax(matrix @ centroids.T, axis=1)
+        # Store rows grouped by list so each list is a contiguous slice
+        order = np.argsort(assignment, kind='stable')
+        matrix = matrix[order]
+        chunks = [chunks[i] for i in order]
+        offsets = np.searchsorted(assignment[order], np.arange(ivf_lists + 1))
+        np.save(directory / CENTROIDS_FILE, centroids)
+        np.save(directory / OFFSETS_FILE, offsets)
+
+    CoarseIndex.remove(directory)
+    if quantization:
+        CoarseIndex.build(matrix, kind=quantization, dims=coarse_dims, subspaces=pq_subspaces).save(directory)
+
+    np.save(directory / EMBEDDINGS_FILE, matrix)
+    (directory / CHUNKS_FILE).write_text(json.dumps(chunks))
+    (directory / MANIFEST_FILE).write_text(json.dumps({
+        'source': source,
+        'count': len(rows),
+        'dim': int(matrix.shape[1]),
+        'ivf_lists': ivf_lists,
+        'quantization': quantization,
+        'coarse_dims': coarse_dims,
+        'created': datetime.now(timezone.utc).isoformat(),
+    }))
+    get_vector_index.cache_clear()
+    return len(rows)
+
+
+def fetch_rows(supabase, source: str) -> List[Dict]:
+    """All pdf_pages rows of a source, with embeddings decoded to float lists"""
+    rows = []
+    start = 0
+    while True:
+        result = supabase.from_('pdf_pages') \
+            .select('id, title, content, page_num, chunk_number, metadata, embedding') \
+            .eq('metadata->>source', source) \
+            .order('id') \
+            .range(start, start + FETCH_PAGE_SIZE - 1) \
+            .execute()
+        for row in result.data:
+            # pgvector columns come back from PostgREST as "[0.1,0.2,...]" strings
+            if isinstance(row['embedding'], str):
+                row['embedding'] = json.loads(row['embedding'])
+            rows.append(row)
+        if len(result.data) < FETCH_PAGE_SIZE:
+            return rows
+        start += FETCH_PAGE_SIZE
+
+
+def snapshot_source(supabase, source: str, ivf_lists: int = 0, quantization: Optional[str] = None,
+                    coarse_dims: Optional[int] = None, pq_subspaces: int = 32) -> int:
+    """Snapshot a pdf_pages source into the local index directory"""
+    return build_index(fetch_rows(supabase, source), INDEX_DIR / source, source, ivf_lists=ivf_lists,
+                       quantization=quantization, coarse_dims=coarse_dims, pq_subspaces=pq_subspaces)
+
+
+REPORT_CONFIGS = [
+    {'kind': 'float32', 'dims': None},
+    {'kind': 'float32', 'dims': 512},
+    {'kind': 'float32', 'dims': 256},
+    {'kind': 'int8', 'dims': None},
+    {'kind': 'int8', 'dims': 512},
+    {'kind': 'int8', 'dims': 256},
+    {'kind': 'pq', 'dims': None, 'subspaces': 96},
+    {'kind': 'pq', 'dims': 512, 'subspaces': 64},
+    {'kind': 'pq', 'dims': 256, 'subspaces': 32},
+]
+
+
+def index_report(index: LocalVectorIndex, n_queries: int = 200, k: int = 5, seed: int = 0) -> List[Dict]:
+    """Recall-vs-latency report over a snapshot, using blends of two random chunks as queries"""
+    matrix = np.asarray(index.embeddings)
+    rng = np.random.default_rng(seed)
+    pairs = rng.integers(len(matrix), size=(n_queries, 2))
+    queries = matrix[pairs[:, 0]] + matrix[pairs[:, 1]]
+    return recall_report(matrix, queries, REPORT_CONFIGS, k=k, rerank_factor=RERANK_FACTOR)
+
+
+@lru_cache(maxsize=None)
+def get_vector_index(source: str) -> Optional[LocalVectorIndex]:
+    """Process-wide local index for a source (None if it has not been snapshotted)"""
+    return LocalVectorIndex.load(INDEX_DIR / source)
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from supabase import create_client
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Snapshot pdf_pages embeddings into a local vector index")
+    parser.add_argument('--source', required=True, help="metadata.source of the pdf_pages rows")
+    parser.add_argument('--ivf-lists', type=int, default=0, help="Build an IVF index with this many lists")
+    parser.add_argument('--quantization', choices=['int8', 'pq'], help="Add a quantized coarse index")
+    parser.add_argument('--coarse-dims', type=int, help="Truncate coarse vectors to this many leading dims")
+    parser.add_argument('--pq-subspaces', type=int, default=32, help="PQ subspaces (must divide the coarse dims)")
+    parser.add_argument('--report', action='store_true', help="Print recall vs latency for the existing snapshot")
+    args = parser.parse_args()
+
+    if args.report:
+        index = get_vector_index(args.source)
+        if index is None:
+            parser.error(f"No snapshot for {args.source} in {INDEX_DIR}")
+        for line in index_report(index):
+            print(line)
+    else:
+        client = create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_KEY'))
+        try:
+            count = snapshot_source(client, args.source, ivf_lists=args.ivf_lists,
+                                    quantization=args.quantization, coarse_dims=args.coarse_dims,
+                                    pq_subspaces=args.pq_subspaces)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Indexed {count} chunks into {INDEX_DIR / args.source}")
@@ -0,0 +1,181 @@
+"""
+Local ACS 5-year summary store for the census metrics the social agent uses.
+
+Ingest every place and county once per ACS vintage:
+
+    python -m VAMM_socialagent_master.acs_store --key $CENSUS_API_KEY
+
+The Parquet files go to data/acs/ (VAMM_DATA_DIR/acs/ when set). Metric fetches then
+become column reads over Parquet-backed frames indexed by GEOID (state + place/county
+FIPS). Variables that were not ingested fall back to the API.
+"""
+
+import argparse
+import pathlib
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import pandas as pd
+import requests
+
+from VAMM_core.http_cache import cached_get_json
+from VAMM_core.paths import DATA_DIR
+
+ACS_YEAR = 2020
+ACS_URL = f"https://api.census.gov/data/{ACS_YEAR}/acs/acs5"
+STORE_DIR = DATA_DIR / 'acs'
+
+VARIABLES = [
+    "B01003_001E",  # Total population
+    "B19013_001E",  # Median household income
+    "B01002_001E",  # Median age
+    "B15003_001E",  # Educational attainment, population 25+
+    "B15003_022E",  # Bachelor's degree
+    "B15003_023E",  # Master's degree
+    "B15003_024E",  # Professional school degree
+    "B15003_025E",  # Doctorate degree
+]
+
+GEOGRAPHIES = {
+    'place': 'place:*',
+    'county': 'county:*',
+}
+
+
+def _store_path(geography: str) -> pathlib.Path:
+    return STORE_DIR / f"acs5_{ACS_YEAR}_{geography}.parquet"
+
+
+def _to_frame(rows: List[List[str]], geography: str) -> pd.DataFrame:
+    header, *data = rows
+    frame = pd.DataFrame(data, columns=header)
+    frame['geoid'] = frame['state'] + frame[geography]
+    for column in frame.columns:
+        if column in ('NAME', 'state', geography, 'geoid'):
+            continue
+        # ACS encodes "not available" as large negative sentinels (e.g. -666666666)
+        values = pd.to_numeric(frame[column], errors='coerce')
+        frame[column] = values.where(values >= 0)
+    return frame.set_index('geoid')
+
+
+def ingest_acs(census_api_key: str, variables: List[str] = VARIABLES) -> Dict[str, int]:
+    """Download the ACS variables for every place and county and write the columnar store"""
+    STORE_DIR.mkdir(parents=True, exist_ok=True)
+    counts = {}
+    for geography, selector in GEOGRAPHIES.items():
+        response = requests.get(
+            ACS_URL,
+            params={
+                "key": census_api_key,
+                "get": ",".join(["NAME"] + variables),
+                "for": selector,
+                "in": "state:*",
+            },
+            timeout=(5, 300)
+        )
+        response.raise_for_status()
+        frame = _to_frame(response.json(), geography)
+        frame.to_parquet(_store_path(geography))
+        counts[geography] = len(frame)
+    get_acs_store.cache_clear()
+    return counts
+
+
+class ACSStore:
+    def __init__(self, frames: Dict[str, pd.DataFrame]):
+        """
+        ACS frames per geography ('place', 'county'), indexed by GEOID
+        """
+        self.frames = frames
+
+    @classmethod
+    def load(cls) -> Optional['ACSStore']:
+        frames = {
+            geography: pd.read_parquet(_store_path(geography))
+            for geography in GEOGRAPHIES
+            if _store_path(geography).exists()
+        }
+        return cls(frames) if frames else None
+
+    def table(self, geography: str = 'place') -> Optional[pd.DataFrame]:
+        """The whole ingested table for a geography"""
+        return self.frames.get(geography)
+
+    def variables(self, geography: str = 'place') -> List[str]:
+        frame = self.frames.get(geography)
+        if frame is None:
+            return []
+        return [column for column in frame.columns if column not in ('NAME', 'state', geography)]
+
+    def get(self, geoids: List[str], metrics: List[str], geography: str = 'place') -> pd.DataFrame:
+        """Rows for the given GEOIDs; only ingested metrics are returned"""
+        frame = self.frames[geography]
+        columns = ['NAME'] + [metric for metric in metrics if metric in frame.columns]
+        return frame.reindex(geoids)[columns]
+
+
+@lru_cache(maxsize=None)
+def get_acs_store() -> Optional[ACSStore]:
+    """Process-wide ACS store (None until ingest_acs has been run)"""
+    return ACSStore.load()
+
+
+def _fetch_remote(state_fips: str, codes: List[str], metrics: List[str], geography: str,
+                  census_api_key: str) -> pd.DataFrame:
+    rows = cached_get_json(
+        'census',
+        ACS_URL,
+        params={
+            "key": census_api_key,
+            "get": ",".join(["NAME"] + metrics),
+            "for": f"{geography}:{','.join(codes)}",
+            "in": f"state:{state_fips}",
+        }
+    )
+    return _to_frame(rows, geography)
+
+
+def get_metrics(state_fips: str, codes: List[str], metrics: List[str], census_api_key: str,
+                geography: str = 'place') -> pd.DataFrame:
+    """
+    ACS metrics for any number of places (or counties) in a state, indexed by GEOID.
+
+    Ingested variables are read from the local store; the rest come from the API in one request.
+    """
+    geoids = [state_fips + code for code in codes]
+    store = get_acs_store()
+    local = None
+    missing = list(metrics)
+    if store is not None and store.table(geography) is not None:
+        local = store.get(geoids, metrics, geography)
+        missing = [metric for metric in metrics if metric not in local.columns]
+        if local['NAME'].isna().any():
+            # Places unknown to the store (e.g. newer than the ingested vintage) need every metric
+            missing = list(metrics)
+
+    if not missing:
+        return local
+
+    remote = _fetch_remote(state_fips, codes, missing, geography, census_api_key)
+    if local is None or len(missing) == len(metrics):
+        return remote.reindex(geoids)[['NAME'] + missing]
+    return local.join(remote[missing])
+
+
+def get_place_metrics(state_fips: str, place_fips: str, metrics: List[str], census_api_key: str) -> Dict:
+    """Single-place convenience wrapper returning a {variable: value} dict like the Census API row"""
+    row = get_metrics(state_fips, [place_fips], metrics, census_api_key).iloc[0]
+    if pd.isna(row['NAME']):
+        raise Exception("No data found for this location")
+    data = {'NAME': row['NAME'], 'state': state_fips, 'place': place_fips}
+    data.update({metric: (None if pd.isna(row[metric]) else float(row[metric])) for metric in metrics})
+    return data
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest ACS 5-year metrics for all places and counties")
+    parser.add_argument('--key', required=True, help="Census API key")
+    args = parser.parse_args()
+    for geography, count in ingest_acs(args.key).items():
+        print(f"Ingested {count} {geography} rows into {_store_path(geography)}")
@@ -1,7 +1,15 @@
 import streamlit as st
 import json
-import requests
+import os
+import sys
+
+# Shared VAMM_core modules live in the parent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 from create_agent import SocialMarketingAgent
+from VAMM_core.http_cache import cached_get_json
+from VAMM_socialagent_master.acs_store import get_acs_store, get_place_metrics
+from VAMM_socialagent_master.place_index import PlaceIndex, PlaceMatch, load_place_index
 from typing import List, Dict
 
 # Set page config
@@ -32,44 +40,50 @@ def initialize_agent():
         st.error(f"Failed to initialize agent: {str(e)}")
         return False
 
-def get_place_fips(city: str, state: str) -> str:
-    """Convert city and state to FIPS place code"""
-    city = city.strip().title()
+def get_place_candidates(city: str, state: str) -> List[PlaceMatch]:
+    """Ranked place matches for a city in a state"""
+    city = city.strip()
     state = state.strip().upper()
+    state_fips = state_codes.get(state, '')
     
-    # Use ACS5 endpoint with proper variables
-    url = "https://api.census.gov/data/2020/acs/acs5"
+    # Local index first, if it has been built; it is loaded once per process and needs no network
+    index = load_place_index()
+    if index is not None:
+        return index.search(city, state_fips)
     
+    # Fall back to the (cached) ACS place list for the state
+    data = cached_get_json(
+        'census',
+        "https://api.census.gov/data/2020/acs/acs5",
+        params={
+            "key": st.secrets["CENSUS_API_KEY"],
+            "get": "NAME",
+            "for": "place:*",
+            "in": f"state:{state_fips}",
+        }
+    )
+    return PlaceIndex({state_fips: [[row[0], row[-1]] for row in data[1:]]}).search(city, state_fips)
+
+def get_place_fips(city: str, state: str) -> str:
+    """Convert city and state to FIPS place code"""
     try:
-        # First get the state FIPS code
-        state_fips = state_codes.get(state, '')
+        candidates = get_place_candidates(city, state)
         
-        # Query with NAME to get place information
-        response = requests.get(
-            url,
-            params={
-                "key": st.secrets["CENSUS_API_KEY"],
-                "get": "NAME",
-                "for": "place:*",
-                "in": f"state:{state_fips}",
-            }
-        )
-        
-        if response.status_code != 200:
-            st.error(f"Census API error: {response.status_code}")
+        if not candidates:
+            st.error(f"Could not find FIPS code for {city}, {state}")
             return None
-            
-        data = response.json()
         
-        # Find the matching place
-        for row in data[1:]:  # Skip header row
-            if city.lower() in row[0].lower():
-                place_fips = row[-1]  # Get place FIPS code
-                st.write(f"Debug - Found place: {row[0]} with FIPS: {place_fips}")
-                return place_fips
-        
-        st.error(f"Could not find FIPS code for {city}, {state}")
-        return None
+        match = candidates[0]
+        if match.score < 1 and len(candidates) > 1:
+            # No exact match; let the user pick from the ranked candidates
+            match = st.selectbox(
+                "Matching places",
+                options=candidates,
+                format_func=lambda m: m.name,
+                key="place_select"
+            )
+        st.write(f"Debug - Found place: {match.name} with FIPS: {match.fips}")
+        return match.fips
         
     except Exception as e:
         st.error(f"Error looking up place code: {str(e)}")
@@ -77,33 +91,11 @@ def get_place_fips(city: str, state: str) -> str:
 
 def fetch_census_data(location: str, state: str, metrics: List[str]) -> Dict:
     """
-    Fetch demographic data from Census API
+    Fetch demographic data (local ACS store first, Census API for anything not ingested)
     """
-    base_url = "https://api.census.gov/data/2020/acs/acs5"
-    
     try:
         state_fips = state_codes.get(state, '')
-        response = requests.get(
-            base_url,
-            params={
-                "key": st.secrets["CENSUS_API_KEY"],
-                "get": ",".join(["NAME"] + metrics),
-                "for": f"place:{location}",
-                "in": f"state:{state_fips}"
-            }
-        )
-        
-        if response.status_code != 200:
-            raise Exception(f"Census API returned status code {response.status_code}")
-            
-        data = response.json()
-        if len(data) < 2:  # No data found
-            raise Exception("No data found for this location")
-            
-        # Convert to dictionary
-        headers = data[0]
-        values = data[1]
-        return dict(zip(headers, values))
+        return get_place_metrics(state_fips, location, metrics, st.secrets["CENSUS_API_KEY"])
         
     except Exception as e:
         raise Exception(f"Failed to fetch census data: {str(e)}")
@@ -207,7 +199,7 @@ if st.session_state.agent is not None:
                         for metric in metrics:
                             metric_code = metric[0]
                             metric_name = metric[1]
-                            if metric_code in census_data:
+                            if census_data.get(metric_code) is not None:
                                 value = census_data[metric_code]
                                 if "income" in metric_name.lower():
                                     formatted_value = f"${int(float(value)):,}"
@@ -233,6 +225,16 @@ if st.session_state.agent is not None:
                         st.write("Debug - Census Data:", st.session_state.agent.demographic_data)
                         st.write("Debug - Goals:", st.session_state.goals)
                         
+                        # Rank every place in the state by audience fit when the ACS store has the place table
+                        acs_store = get_acs_store()
+                        if acs_store is not None and acs_store.table('place') is not None:
+                            target_places = st.session_state.agent.rank_target_places(
+                                state_codes.get(state),
+                                target_audience
+                            )
+                            st.markdown("### Top Target Places")
+                            st.dataframe(target_places)
+                        
                         strategy = st.session_state.agent.generate_campaign_strategy(
                             prompt=f"Generate a strategy for {business_name} ({business_type}) in {city}, {state}",
                             target_audience=target_audience,
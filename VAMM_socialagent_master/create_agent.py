@@ -1,28 +1,36 @@
 import pandas as pd
-import requests
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import openai
 from datetime import datetime
+from VAMM_core.http_cache import cached_get_json
+from VAMM_socialagent_master.acs_store import get_acs_store, get_place_metrics
+from VAMM_socialagent_master.place_ranking import profile_for, rank_places
 
 class SocialMarketingAgent:
-    def __init__(self, api_key: str, census_api_key: str):
+    def __init__(self, api_key: str, census_api_key: str, client: Optional[openai.Client] = None):
         """
-        Initialize the Social Marketing Agent with necessary API keys
+        Initialize the Social Marketing Agent with necessary API keys (or a shared OpenAI client)
         """
         self.openai_api_key = api_key  # Use the passed-in API key instead of hardcoding
         self.census_api_key = census_api_key
         self.demographic_data = None
-        self.client = openai.Client(api_key=self.openai_api_key)
+        self.target_places = None
+        self.client = client or openai.Client(api_key=self.openai_api_key)
         
-    def fetch_census_data(self, location: str, metrics: List[str]) -> Dict:
+    def fetch_census_data(self, location: str, metrics: List[str], state_fips: Optional[str] = None) -> Dict:
         """
-        Fetch demographic data from Census API
+        Fetch demographic data from the local ACS store (when the state is known) or the Census API
         """
         # Example metrics: population, median_income, age_distribution, education_levels
         base_url = "https://api.census.gov/data/2020/acs/acs5"
         
         try:
-            response = requests.get(
+            if state_fips:
+                self.demographic_data = get_place_metrics(state_fips, location, metrics, self.census_api_key)
+                return self.demographic_data
+            
+            self.demographic_data = cached_get_json(
+                'census',
                 base_url,
                 params={
                     "key": self.census_api_key,
@@ -30,11 +38,33 @@ class SocialMarketingAgent:
                     "for": f"place:{location}"
                 }
             )
-            self.demographic_data = response.json()
             return self.demographic_data
         except Exception as e:
             raise Exception(f"Failed to fetch census data: {str(e)}")
 
+    def rank_target_places(self,
+                           state_fips: Optional[str],
+                           target_audience: str,
+                           center: Optional[Tuple[float, float]] = None,
+                           radius_km: Optional[float] = None,
+                           top_k: int = 10) -> pd.DataFrame:
+        """
+        Rank every place in a state (or within radius_km of center) by fit with the target audience
+        """
+        store = get_acs_store()
+        if store is None or store.table('place') is None:
+            raise ValueError("Place ranking needs the local ACS store (python -m VAMM_socialagent_master.acs_store)")
+
+        self.target_places = rank_places(
+            store.table('place'),
+            profile_for(target_audience),
+            state_fips=state_fips,
+            center=center,
+            radius_km=radius_km,
+            top_k=top_k
+        )
+        return self.target_places
+
     def generate_campaign_strategy(self, 
                                  prompt: str,
                                  target_audience: str,
@@ -43,7 +73,7 @@ class SocialMarketingAgent:
         """
         Generate marketing campaign strategy based on demographics and prompt
         """
-        if not self.demographic_data:
+        if not self.demographic_data and self.target_places is None:
             raise ValueError("Demographic data must be fetched first")
 
         # Construct the prompt for the AI
@@ -53,9 +83,15 @@ class SocialMarketingAgent:
         Focus on social impact, community engagement, and ethical considerations.
         """
         
+        # Only the top-ranked places go into the prompt
+        target_places = "Not ranked"
+        if self.target_places is not None and not self.target_places.empty:
+            target_places = self.target_places.to_string()
+        
         # Combine all relevant information
         full_prompt = f"""
         Demographics Data: {self.demographic_data}
+        Top Target Places (ranked by audience fit): {target_places}
         Campaign Goals: {campaign_goals}
         Target Audience: {target_audience}
         Budget: {budget if budget else 'Not specified'}
@@ -86,6 +122,27 @@ class SocialMarketingAgent:
             "demographic_data_used": self.demographic_data
         }
 
+    def get_response(self, message: str, context: Optional[str] = None) -> str:
+        """
+        Answer a free-form question about a project's social media marketing
+        """
+        system_prompt = """
+        You are a specialized ESG Social Marketing strategist for renewable energy projects.
+        Answer the user's question about marketing, community engagement and social impact
+        for their project, using the project details provided.
+        """
+        
+        messages = [{"role": "system", "content": system_prompt}]
+        if context:
+            messages.append({"role": "system", "content": f"Project details: {context}"})
+        messages.append({"role": "user", "content": message})
+        
+        response = self.client.chat.completions.create(
+            model="gpt-3.5-turbo-0125",
+            messages=messages
+        )
+        return response.choices[0].message.content
+
     def analyze_social_impact(self, campaign_results: Dict) -> Dict:
         """
         Analyze the social impact of the marketing campaign
@@ -0,0 +1,172 @@
+"""
+Local place-name -> FIPS index for the social agent.
+
+The index is not committed; build it once from the ACS place list into data/acs/
+(VAMM_DATA_DIR/acs/ when set), and again when moving to a new ACS vintage:
+
+    python -m VAMM_socialagent_master.place_index --key $CENSUS_API_KEY
+
+With the file in place, lookups are offline and happen in memory. Without it, the app
+falls back to the (cached) Census API place list for the state.
+"""
+
+import argparse
+import bisect
+import gzip
+import json
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+import requests
+
+from VAMM_core.geocoder import normalize_name, strip_place_suffix
+from VAMM_core.paths import DATA_DIR
+
+ACS_YEAR = 2020
+INDEX_VERSION = f"acs5-{ACS_YEAR}"
+INDEX_PATH = DATA_DIR / 'acs' / f'places_{INDEX_VERSION}.json.gz'
+
+
+@dataclass(frozen=True)
+class PlaceMatch:
+    name: str
+    fips: str
+    score: float
+
+
+def _place_key(acs_name: str) -> str:
+    # ACS names look like "Austin city, Texas"
+    return normalize_name(strip_place_suffix(acs_name.rsplit(',', 1)[0]))
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class StatePlaces:
+    def __init__(self, rows: Sequence[Sequence[str]]):
+        """
+        Sorted place names for one state, with a lazily built trigram index for fuzzy matching
+        """
+        entries = sorted((_place_key(name), name, fips) for name, fips in rows)
+        self.keys = [key for key, _, _ in entries]
+        self.names = [name for _, name, _ in entries]
+        self.fips = [fips for _, _, fips in entries]
+        self._trigram_index = None
+
+    def _trigram_postings(self) -> Dict[str, List[int]]:
+        if self._trigram_index is None:
+            postings = defaultdict(list)
+            for i, key in enumerate(self.keys):
+                for trigram in _trigrams(key):
+                    postings[trigram].append(i)
+            self._trigram_index = dict(postings)
+        return self._trigram_index
+
+    def search(self, query: str, limit: int = 5) -> List[PlaceMatch]:
+        """Ranked candidates: exact matches, then prefix matches, then trigram similarity"""
+        key = normalize_name(strip_place_suffix(query))
+        if not key:
+            return []
+        scores = {}
+
+        lo = bisect.bisect_left(self.keys, key)
+        hi = bisect.bisect_right(self.keys, key + '\x7f')
+        for i in range(lo, hi):
+            if self.keys[i] == key:
+                scores[i] = 1.0
+            else:
+                # Prefix hit; shorter completions rank higher
+                scores[i] = 0.8 + 0.1 * len(key) / len(self.keys[i])
+
+        query_trigrams = _trigrams(key)
+        overlap = defaultdict(int)
+        postings = self._trigram_postings()
+        for trigram in query_trigrams:
+            for i in postings.get(trigram, ()):
+                overlap[i] += 1
+        for i, shared in overlap.items():
+            # Dice coefficient over trigram sets
+            similarity = 2 * shared / (len(query_trigrams) + len(_trigrams(self.keys[i])))
+            if similarity >= 0.4 and similarity * 0.8 > scores.get(i, 0):
+                scores[i] = similarity * 0.8
+
+        # Ties go to incorporated places over census-designated places of the same name
+        ranked = sorted(
+            scores.items(),
+            key=lambda item: (-item[1], self.names[item[0]].rsplit(',', 1)[0].lower().endswith(' cdp'), self.keys[item[0]])
+        )
+        return [PlaceMatch(self.names[i], self.fips[i], round(score, 3)) for i, score in ranked[:limit]]
+
+
+class PlaceIndex:
+    def __init__(self, states: Dict[str, Sequence[Sequence[str]]], version: str = INDEX_VERSION):
+        """
+        Map of state FIPS -> StatePlaces
+        """
+        self.version = version
+        self.states = {state: StatePlaces(rows) for state, rows in states.items()}
+
+    @classmethod
+    def load(cls, path=INDEX_PATH) -> Optional['PlaceIndex']:
+        if not path.exists():
+            return None
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            payload = json.load(f)
+        return cls(payload['states'], version=payload['version'])
+
+    def search(self, city: str, state_fips: str, limit: int = 5) -> List[PlaceMatch]:
+        places = self.states.get(state_fips)
+        if places is None:
+            return []
+        return places.search(city, limit=limit)
+
+
+@lru_cache(maxsize=None)
+def load_place_index() -> Optional[PlaceIndex]:
+    """Process-wide place index (None until it has been built)"""
+    return PlaceIndex.load()
+
+
+def build_place_index(census_api_key: str, path=INDEX_PATH) -> int:
+    """Download every ACS place name and write the local index"""
+    response = requests.get(
+        f"https://api.census.gov/data/{ACS_YEAR}/acs/acs5",
+        params={
+            "key": census_api_key,
+            "get": "NAME",
+            "for": "place:*",
+            "in": "state:*",
+        },
+        timeout=(5, 120)
+    )
+    response.raise_for_status()
+    header, *rows = response.json()
+    name_col, state_col, place_col = header.index('NAME'), header.index('state'), header.index('place')
+
+    states = defaultdict(list)
+    for row in rows:
+        states[row[state_col]].append([row[name_col], row[place_col]])
+
+    payload = {
+        'version': INDEX_VERSION,
+        'built': datetime.now(timezone.utc).isoformat(),
+        'states': states,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump(payload, f, separators=(',', ':'))
+    load_place_index.cache_clear()
+    return len(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the local ACS place-name index")
+    parser.add_argument('--key', required=True, help="Census API key")
+    args = parser.parse_args()
+    count = build_place_index(args.key)
+    print(f"Indexed {count} places into {INDEX_PATH}")
@@ -0,0 +1,167 @@
+"""
+Vectorized ranking of places by target-audience fit.
+
+Every place in the ACS table is scored in one pass: each feature is standardized
+across the candidate set and combined with the audience profile's weights, so
+scoring a whole state (or every place within N km of a project) is a few array ops.
+"""
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from VAMM_core.geocoder import KIND_PLACE, get_gazetteer
+
+EARTH_RADIUS_KM = 6371.0
+
+EDUCATION_COLUMNS = ["B15003_022E", "B15003_023E", "B15003_024E", "B15003_025E"]
+
+
+@dataclass(frozen=True)
+class AudienceProfile:
+    name: str
+    target_age: float = 38.0
+    weights: Dict[str, float] = field(default_factory=lambda: {
+        'population': 1.0,
+        'income': 1.0,
+        'age': 1.0,
+        'education': 1.0,
+    })
+
+
+AUDIENCE_PROFILES = {
+    'general': AudienceProfile('general'),
+    'young professionals': AudienceProfile(
+        'young professionals', target_age=30,
+        weights={'population': 1.0, 'income': 1.0, 'age': 1.5, 'education': 1.5}
+    ),
+    'families': AudienceProfile(
+        'families', target_age=36,
+        weights={'population': 1.0, 'income': 1.0, 'age': 1.0, 'education': 0.5}
+    ),
+    'retirees': AudienceProfile(
+        'retirees', target_age=62,
+        weights={'population': 0.5, 'income': 1.0, 'age': 2.0, 'education': 0.5}
+    ),
+    'homeowners': AudienceProfile(
+        'homeowners', target_age=45,
+        weights={'population': 0.5, 'income': 2.0, 'age': 1.0, 'education': 0.5}
+    ),
+}
+
+PROFILE_KEYWORDS = {
+    'young professionals': ('young', 'professional', 'student', 'millennial', 'gen z'),
+    'families': ('famil', 'parent', 'kids', 'children'),
+    'retirees': ('retire', 'senior', 'older', 'elderly'),
+    'homeowners': ('homeowner', 'property owner', 'landowner', 'affluent'),
+}
+
+
+def profile_for(target_audience: Optional[str]) -> AudienceProfile:
+    """Pick the audience profile whose keywords appear in the free-text target audience"""
+    text = (target_audience or '').lower()
+    for profile, keywords in PROFILE_KEYWORDS.items():
+        if any(keyword in text for keyword in keywords):
+            return AUDIENCE_PROFILES[profile]
+    return AUDIENCE_PROFILES['general']
+
+
+@lru_cache(maxsize=None)
+def place_coordinates() -> Optional[pd.DataFrame]:
+    """Place internal points from the gazetteer, indexed by 7-digit place GEOID"""
+    gazetteer = get_gazetteer()
+    if gazetteer is None:
+        return None
+    places = gazetteer.records[gazetteer.records['kind'] == KIND_PLACE]
+    return pd.DataFrame(
+        {
+            'latitude': places['latitude'].astype(np.float64),
+            'longitude': places['longitude'].astype(np.float64),
+        },
+        index=pd.Index(places['place_fips'].astype(str), name='geoid'),
+    )
+
+
+def _haversine_km(lat: np.ndarray, lon: np.ndarray, center: Tuple[float, float]) -> np.ndarray:
+    lat, lon = np.radians(lat), np.radians(lon)
+    clat, clon = np.radians(center[0]), np.radians(center[1])
+    a = np.sin((lat - clat) / 2) ** 2 + np.cos(lat) * np.cos(clat) * np.sin((lon - clon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def _zscore(values: np.ndarray) -> np.ndarray:
+    mean = np.nanmean(values)
+    std = np.nanstd(values)
+    if not np.isfinite(std) or std == 0:
+        return np.zeros_like(values)
+    # Missing values score as average rather than disqualifying the place
+    return np.nan_to_num((values - mean) / std)
+
+
+def rank_places(table: pd.DataFrame,
+                profile: AudienceProfile,
+                state_fips: Optional[str] = None,
+                center: Optional[Tuple[float, float]] = None,
+                radius_km: Optional[float] = None,
+                top_k: int = 10) -> pd.DataFrame:
+    """
+    Score places in an ACS place table (indexed by GEOID) and return the top_k.
+
+    Restrict candidates to a state, and/or to places within radius_km of center
+    (needs the gazetteer index for place coordinates).
+    """
+    candidates = table
+    if state_fips:
+        candidates = candidates[candidates['state'] == state_fips]
+
+    distance = None
+    if center is not None:
+        coordinates = place_coordinates()
+        if coordinates is None:
+            raise ValueError("Distance filtering needs the gazetteer index (python -m VAMM_core.geocoder)")
+        located = coordinates.reindex(candidates.index)
+        distance = _haversine_km(located['latitude'].to_numpy(), located['longitude'].to_numpy(), center)
+        if radius_km is not None:
+            within = distance <= radius_km
+            candidates, distance = candidates[within], distance[within]
+
+    if candidates.empty:
+        return pd.DataFrame(columns=['NAME', 'population', 'median_income', 'median_age', 'education_share', 'score'])
+
+    population = candidates["B01003_001E"].to_numpy(dtype=float)
+    income = candidates["B19013_001E"].to_numpy(dtype=float)
+    median_age = candidates["B01002_001E"].to_numpy(dtype=float)
+    adults = candidates["B15003_001E"].to_numpy(dtype=float)
+    degrees = candidates[EDUCATION_COLUMNS].to_numpy(dtype=float).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        education_share = np.where(adults > 0, degrees / adults, np.nan)
+
+    weights = profile.weights
+    score = (
+        weights.get('population', 0) * _zscore(np.log1p(population))
+        + weights.get('income', 0) * _zscore(income)
+        + weights.get('age', 0) * _zscore(-np.abs(median_age - profile.target_age))
+        + weights.get('education', 0) * _zscore(education_share)
+    )
+
+    k = min(top_k, len(score))
+    top = np.argpartition(-score, k - 1)[:k]
+    top = top[np.argsort(-score[top])]
+
+    ranked = pd.DataFrame(
+        {
+            'NAME': candidates['NAME'].to_numpy()[top],
+            'population': population[top],
+            'median_income': income[top],
+            'median_age': median_age[top],
+            'education_share': np.round(education_share[top], 3),
+            'score': np.round(score[top], 3),
+        },
+        index=candidates.index[top],
+    )
+    if distance is not None:
+        ranked.insert(len(ranked.columns) - 1, 'distance_km', np.round(distance[top], 1))
+    return ranked
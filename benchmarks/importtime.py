@@ -0,0 +1,107 @@
+"""
+Import cost of each Streamlit page, from python -X importtime, checked against a budget.
+
+Only a page's unconditional module-level imports are measured (imports inside
+functions are the lazily loaded agent stacks). Each run is a fresh interpreter;
+the best of --runs is compared to the page's budget and the script exits 1 if any
+page is over:
+
+    python benchmarks/importtime.py
+    python benchmarks/importtime.py --top 15
+    python benchmarks/importtime.py --budget Home.py=1500
+"""
+
+import argparse
+import ast
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Milliseconds of module-level imports per page: the measured cost (Home ~1250 ms,
+# dashboard ~800-950 ms, mostly openai and streamlit) plus a small margin, so a new
+# eager import shows up as a failure
+BUDGET_MS: Dict[str, float] = {
+    'Home.py': 1400,
+    'pages/1_Project_Dashboard.py': 1000,
+}
+
+MARKER = 'VAMM_IMPORTTIME_START'
+
+
+def page_imports(page: str) -> List[str]:
+    """The page's unconditional module-level import statements (top level or in a try block)"""
+    with open(os.path.join(REPO_DIR, page), encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=page)
+
+    statements = []
+
+    def visit(body):
+        for node in body:
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                statements.append(ast.unparse(node))
+            elif isinstance(node, ast.Try):
+                visit(node.body)
+
+    # Imports inside functions, or behind an if (e.g. a button), are not paid on page load
+    visit(tree.body)
+    return statements
+
+
+def measure(page: str) -> Tuple[float, List[Tuple[float, str]]]:
+    """Total import time of the page in ms, and (ms, module) for each top-level import"""
+    code = "\n".join([
+        "import sys",
+        f"sys.path.insert(0, {REPO_DIR!r})",
+        # Everything python -X importtime reports after this line belongs to the page
+        f"sys.stderr.write({MARKER!r} + '\\n'); sys.stderr.flush()",
+        *page_imports(page),
+    ])
+    env = dict(os.environ, OPENAI_API_KEY=os.getenv('OPENAI_API_KEY', 'benchmark'))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=REPO_DIR, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    lines = result.stderr.splitlines()
+    modules = []
+    for line in lines[lines.index(MARKER) + 1:]:
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line.split('|')
+        # Top-level entries are indented by a single space; nested imports are counted in them
+        if not cumulative.strip().isdigit() or name[1:2] == ' ':
+            continue
+        modules.append((int(cumulative) / 1000, name.strip()))
+    return sum(ms for ms, _ in modules), sorted(modules, reverse=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the pages' import time against a budget")
+    parser.add_argument('--page', action='append', help="Page script(s) relative to the repo root")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=5, help="Heaviest top-level imports to list per page")
+    parser.add_argument('--budget', action='append', default=[], metavar='PAGE=MS')
+    args = parser.parse_args()
+
+    budgets = dict(BUDGET_MS)
+    for override in args.budget:
+        page, ms = override.rsplit('=', 1)
+        budgets[page] = float(ms)
+
+    over_budget = []
+    for page in args.page or list(BUDGET_MS):
+        total, modules = min((measure(page) for _ in range(args.runs)), key=lambda run: run[0])
+        budget = budgets.get(page)
+        status = 'no budget' if budget is None else ('OK' if total <= budget else 'OVER BUDGET')
+        print(f"{page}: {total:.0f} ms imports (budget {budget or '-'} ms) {status}")
+        for ms, name in modules[:args.top]:
+            print(f"  {ms:8.1f} ms  {name}")
+        if budget is not None and total > budget:
+            over_budget.append(page)
+
+    if over_budget:
+        print(f"Import time over budget: {', '.join(over_budget)}")
+        sys.exit(1)
@@ -0,0 +1,67 @@
+"""
+Cold load time of the Streamlit pages, measured with streamlit's AppTest.
+
+Each run executes a page script from scratch in a fresh interpreter, the way a new
+session's first render does (no button presses, so no LLM or FEMA calls are made):
+
+    python benchmarks/page_load.py --runs 5
+    python benchmarks/page_load.py --page Home.py
+
+Placeholder credentials are used when none are set; clients are created but not called.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = ['pages/1_Project_Dashboard.py', 'Home.py']
+
+PLACEHOLDER_ENV = {
+    'OPENAI_API_KEY': 'benchmark',
+    'SUPABASE_URL': 'https://benchmark.supabase.co',
+    # supabase-py only checks the key looks like a JWT
+    'SUPABASE_SERVICE_KEY': 'benchmark.placeholder.key',
+}
+
+
+def load_once(page: str, timeout: float) -> float:
+    """Run one page in a subprocess and return its script run time in seconds"""
+    import subprocess
+    code = (
+        "import sys, time\n"
+        f"sys.path.insert(0, {REPO_DIR!r})\n"
+        "from streamlit.testing.v1 import AppTest\n"
+        f"app = AppTest.from_file({os.path.join(REPO_DIR, page)!r}, default_timeout={timeout})\n"
+        "started = time.perf_counter()\n"
+        "app.run()\n"
+        "elapsed = time.perf_counter() - started\n"
+        "for exception in app.exception:\n"
+        "    print('EXCEPTION', exception.value)\n"
+        "print('ELAPSED', elapsed, flush=True)\n"
+    )
+    env = dict(PLACEHOLDER_ENV, **os.environ)
+    result = subprocess.run([sys.executable, '-c', code], cwd=REPO_DIR, env=env,
+                            capture_output=True, text=True, timeout=timeout * 2)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    lines = result.stdout.strip().splitlines()
+    for line in lines:
+        if line.startswith('EXCEPTION'):
+            print(f"  {page} raised: {line[len('EXCEPTION '):]}")
+    return next(float(line.split()[1]) for line in lines if line.startswith('ELAPSED'))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure cold page load time")
+    parser.add_argument('--page', action='append', help="Page script(s) relative to the repo root")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--timeout', type=float, default=60)
+    args = parser.parse_args()
+
+    for page in args.page or PAGES:
+        timings = [load_once(page, args.timeout) for _ in range(args.runs)]
+        print(f"{page}: median {statistics.median(timings) * 1000:.0f} ms, "
+              f"min {min(timings) * 1000:.0f} ms over {args.runs} cold loads")
@@ -0,0 +1,130 @@
+"""
+Latency of a multi-tool governance turn with blocking vs pooled Supabase access.
+
+The model is scripted to request retrieve_relevant_documentation,
+list_documentation_pages and get_page_content in one response (pydantic_ai runs
+them concurrently), over several sources. Supabase and OpenAI are replaced by
+fakes that sleep for a fixed round-trip latency, so no credentials are needed:
+
+    python benchmarks/tool_concurrency.py --latency 0.15 --runs 5
+
+'blocking' calls the synchronous .execute() inline as the tools used to;
+'pooled' goes through VAMM_governanceagent.db.execute.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Keep the embedding cache out of the real data dir and satisfy the model setup at import
+os.environ.setdefault('VAMM_DATA_DIR', tempfile.mkdtemp())
+os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+
+from pydantic_ai.messages import ModelResponse, TextPart, ToolCallPart, ToolReturnPart
+from pydantic_ai.models.function import FunctionModel
+
+from VAMM_governanceagent import db, page_store
+from VAMM_governanceagent.Expert_Agent import PydanticAIDeps, pydantic_ai_expert
+
+SOURCES = ['renewable_energy_siting_policies', 'state_siting_rules', 'county_ordinances']
+
+
+class FakeQuery:
+    def __init__(self, latency: float, data):
+        self.latency = latency
+        self.data = data
+
+    def __getattr__(self, name):
+        # Any filter/order/range call just returns the builder
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        time.sleep(self.latency)
+        return SimpleNamespace(data=self.data, count=len(self.data))
+
+
+class FakeSupabase:
+    def __init__(self, latency: float):
+        """
+        Synchronous Supabase stand-in with a fixed round-trip latency
+        """
+        self.latency = latency
+        self.rows = [
+            {'id': i, 'title': 'Siting policy', 'content': 'Setbacks ...', 'page_num': i // 2,
+             'chunk_number': i % 2, 'content_hash': str(i), 'similarity': 0.5}
+            for i in range(20)
+        ]
+
+    def from_(self, table):
+        return FakeQuery(self.latency, self.rows)
+
+    def rpc(self, name, params):
+        return FakeQuery(self.latency, self.rows[:params['match_count']])
+
+
+class FakeEmbeddings:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def create(self, model, input):
+        await asyncio.sleep(self.latency)
+        return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=[0.1] * 8) for i in range(len(input))])
+
+
+def scripted_model(messages, info):
+    if any(isinstance(part, ToolReturnPart) for message in messages for part in message.parts):
+        return ModelResponse(parts=[TextPart('done')])
+    question = str(time.perf_counter())  # unique, so the embedding cache never hits
+    return ModelResponse(parts=[
+        ToolCallPart.from_raw_args('retrieve_relevant_documentation', {'user_query': question}),
+        ToolCallPart.from_raw_args('list_documentation_pages', {}),
+        ToolCallPart.from_raw_args('get_page_content', {'page_num': 1}),
+    ])
+
+
+async def blocking_execute(query):
+    return query.execute()
+
+
+async def run_turn(deps) -> float:
+    started = time.perf_counter()
+    await pydantic_ai_expert.run('What are the setback rules?', deps=deps, model=FunctionModel(scripted_model))
+    return time.perf_counter() - started
+
+
+def measure(mode: str, latency: float, runs: int):
+    pooled_execute = db.execute
+    if mode == 'blocking':
+        db.execute = blocking_execute
+    try:
+        deps = PydanticAIDeps(
+            supabase=FakeSupabase(latency),
+            openai_client=SimpleNamespace(embeddings=FakeEmbeddings(latency)),
+            sources=SOURCES
+        )
+        return [asyncio.run(run_turn(deps)) for _ in range(runs)]
+    finally:
+        db.execute = pooled_execute
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark concurrent governance tool calls")
+    parser.add_argument('--latency', type=float, default=0.15, help="Simulated round trip in seconds")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    # Revalidate on every call so page tools hit the database like a cold store would
+    page_store.REVALIDATE_SECONDS = 0
+
+    results = {mode: measure(mode, args.latency, args.runs) for mode in ('blocking', 'pooled')}
+    for mode, timings in results.items():
+        print(f"{mode:>8}: median {statistics.median(timings) * 1000:.0f} ms, "
+              f"min {min(timings) * 1000:.0f} ms over {args.runs} turns")
+    speedup = statistics.median(results['blocking']) / statistics.median(results['pooled'])
+    print(f"speedup: {speedup:.1f}x")
@@ -1,25 +1,27 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime
 import json
 import os
 import openai
 from dotenv import load_dotenv
-from Home import stream_llm_response
+from VAMM_core.streaming import StreamRenderer, stream_llm_response
 import sys
-from VAMM_governanceagent.create_agent import GovernanceAgent
-from VAMM_socialagent_master.create_agent import SocialMarketingAgent
-from VAMM_governanceagent.Expert_Agent import pydantic_ai_expert, PydanticAIDeps
-from openai import AsyncOpenAI
-from supabase import create_client, Client
+from VAMM_core.event_loop import get_background_loop
+from VAMM_core.llm_cache import cached_chat_stream
+from VAMM_core.resources import get_registry
+from VAMM_core.warmup import warm_stacks
 import pathlib
 
 # Add the parent directory to the Python path
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(parent_dir)
 
-# Import using the folder name with underscores
-from VAMM_socialagent_master.create_agent import SocialMarketingAgent
+# Set page config
+st.set_page_config(
+    page_title="Project Dashboard",
+    page_icon="📊",
+    layout="wide"
+)
 
 # Load environment variables
 load_dotenv()
@@ -40,14 +42,42 @@ if not supabase_url or not supabase_key:
     st.error("Supabase credentials not found. Please check your .env file.")
     st.stop()
 
-supabase_client = create_client(supabase_url, supabase_key)
+# Clients and shareable agents are built once per process, not on every rerun
+registry = get_registry()
 
-# Set page config
-st.set_page_config(
-    page_title="Project Dashboard",
-    page_icon="📊",
-    layout="wide"
-)
+# The agent stacks (pydantic_ai, supabase, googlesearch, pandas) are imported where they are
+# first used, and warmed in the background once the page has rendered (see bottom of script)
+def get_social_agent():
+    if 'social_agent' not in st.session_state:
+        from VAMM_socialagent_master.create_agent import SocialMarketingAgent
+        # The agent keeps per-user campaign data, so each session gets its own around the shared client
+        st.session_state.social_agent = SocialMarketingAgent(
+            api_key=api_key,
+            census_api_key=os.getenv('CENSUS_API_KEY'),
+            client=registry.get('openai')
+        )
+    return st.session_state.social_agent
+
+def get_governance_deps(project=None):
+    from VAMM_core.geocoder import parse_location
+    from VAMM_governanceagent.Expert_Agent import PydanticAIDeps
+    # Async clients live on the background loop for the whole process, so their
+    # connection pools (and TLS sessions) are reused across messages and reruns
+    return PydanticAIDeps(
+        supabase=registry.get('supabase_async'),
+        openai_client=registry.get('openai_async'),
+        state=parse_location(project.get('location', ''))[1] if project else None
+    )
+
+def preload_governance_pages():
+    # Load the governance page manifests before the first agent tool call
+    from VAMM_governanceagent.page_store import preload_page_store
+    from VAMM_governanceagent.sources import load_sources
+    supabase = registry.get('supabase_async')
+    return [
+        get_background_loop().submit(preload_page_store(supabase, source))
+        for source in load_sources()
+    ]
 
 def inject_hotjar():
     # Get the path to the hotjar.html file
@@ -194,15 +224,15 @@ def get_social_media_strategy(project):
         Format your response in clear sections with actionable items.
         """
         
-        response = openai.chat.completions.create(
+        response = cached_chat_stream(
+            openai,
             model="gpt-4",
             messages=[
                 {"role": "system", "content": "You are an expert social media marketing strategist specializing in renewable energy projects and ESG improvement."},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.7,
-            max_tokens=1500,
-            stream=True  # Enable streaming
+            max_tokens=1500
         )
         return stream_llm_response(response)
     except Exception as e:
@@ -251,15 +281,15 @@ def get_environmental_strategy(project):
         Include estimated environmental impact improvements for each measure.
         """
         
-        response = openai.chat.completions.create(
+        response = cached_chat_stream(
+            openai,
             model="gpt-4",
             messages=[
                 {"role": "system", "content": "You are an expert environmental specialist focusing on renewable energy projects and ESG improvement. Provide detailed, technical, yet actionable recommendations."},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.7,
-            max_tokens=1500,
-            stream=True  # Enable streaming
+            max_tokens=1500
         )
         return stream_llm_response(response)
     except Exception as e:
@@ -274,72 +304,24 @@ def get_project_specific_response(project, question):
         {question}
         """
         
-        response = openai.chat.completions.create(
+        response = cached_chat_stream(
+            openai,
             model="gpt-4",
             messages=[
                 {"role": "system", "content": "You are an expert consultant on renewable energy projects."},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.7,
-            max_tokens=1000,
-            stream=True  # Enable streaming
+            max_tokens=1000
         )
         return stream_llm_response(response)
     except Exception as e:
         return f"An error occurred: {str(e)}"
 
-def stream_llm_response(response):
-    placeholder = st.empty()
-    full_response = ""
-    for chunk in response:
-        if chunk.choices[0].delta.content is not None:
-            full_response += chunk.choices[0].delta.content
-            placeholder.markdown(full_response + "▌")
-    placeholder.markdown(full_response)
-    return full_response
-
-# Update the async helper functions
-async def get_expert_response(prompt, deps):
-    response = await pydantic_ai_expert.run(
-        prompt,
-        deps=deps
-    )
-    # Extract the data field from the response which contains the formatted text
-    return response.data if hasattr(response, 'data') else str(response)
-
-def run_async_response(prompt, deps):
-    import asyncio
-    return asyncio.run(get_expert_response(prompt, deps))
-
-async def handle_project_chat():
-    # Initialize OpenAI client
-    openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    
-    # Initialize dependencies
-    deps = PydanticAIDeps(
-        supabase=supabase_client,
-        openai_client=openai_client
-    )
-    
-    if "project_messages" not in st.session_state:
-        st.session_state.project_messages = []
-
-    for message in st.session_state.project_messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
-
-    if prompt := st.chat_input("What would you like to know about your renewable energy project?"):
-        st.session_state.project_messages.append({"role": "user", "content": prompt})
-        with st.chat_message("user"):
-            st.markdown(prompt)
-
-        with st.chat_message("assistant"):
-            response = await pydantic_ai_expert.run(
-                prompt,
-                deps=deps
-            )
-            st.markdown(response)
-            st.session_state.project_messages.append({"role": "assistant", "content": response})
+def stream_expert_to_placeholder(prompt, deps):
+    # Deltas are produced on the background loop and rendered from the script thread
+    from VAMM_governanceagent.Expert_Agent import stream_expert_response
+    return StreamRenderer().render(get_background_loop().iterate(stream_expert_response(prompt, deps)))
 
 # Title
 st.title("Project Dashboard 📊")
@@ -419,7 +401,7 @@ else:
                                 """
                                 
                                 # Get response from social agent
-                                response = st.session_state.social_agent.get_response(
+                                response = get_social_agent().get_response(
                                     user_message, 
                                     context=project_context
                                 )
@@ -469,24 +451,18 @@ else:
 
                         with st.chat_message("assistant"):
                             with st.spinner("Processing your request..."):
-                                # Initialize OpenAI client
-                                openai_client = AsyncOpenAI(api_key=api_key)
-                                
-                                # Initialize dependencies
-                                deps = PydanticAIDeps(
-                                    supabase=supabase_client,
-                                    openai_client=openai_client
-                                )
+                                # Long-lived clients; the project's state picks the document sources
+                                deps = get_governance_deps(project)
                                 
-                                # Get response from expert agent
-                                response = run_async_response(prompt, deps)
-                                st.write(response)
+                                # Stream the expert agent's answer as it is generated
+                                response = stream_expert_to_placeholder(prompt, deps)
                                 st.session_state.project_messages.append({"role": "assistant", "content": response})
 
 # Export All Projects functionality
 if st.session_state.projects:
     st.sidebar.header("Bulk Actions")
     if st.sidebar.button("Export All Projects"):
+        import pandas as pd
         df = pd.DataFrame(st.session_state.projects)
         csv = df.to_csv(index=False)
         st.sidebar.download_button(
@@ -494,4 +470,20 @@ if st.session_state.projects:
             data=csv,
             file_name="all_renewable_energy_projects.csv",
             mime="text/csv"
-        )
\ No newline at end of file
+        )
+
+# Shared resources: warm state and health of the process-wide clients, for operators only
+if os.getenv('VAMM_DEBUG') == '1':
+    with st.sidebar.expander("System Health"):
+        if st.button("Check connections"):
+            for name in registry.names():
+                registry.check(name)
+        st.dataframe(registry.health(), hide_index=True)
+
+@st.cache_resource
+def start_background_warmup():
+    # Once per process, after the first render: import the agent stacks, then open the
+    # Supabase client and preload the governance pages
+    return warm_stacks(then=preload_governance_pages)
+
+start_background_warmup()